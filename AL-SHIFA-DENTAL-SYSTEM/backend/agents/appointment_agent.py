@@ -1,12 +1,16 @@
 import json
+import re
+from bisect import bisect_left, bisect_right, insort
 from datetime import date, datetime
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict
+from uuid import UUID
 from pydantic import BaseModel, Field
 
 # --- 1. STRUCTURED I/O ---
 class AgentInput(BaseModel):
     user_query: str
     patient_id: Optional[str] = None
+    doctor_id: Optional[UUID] = None # validated here: the API passes it straight to the database
     session_id: str
 
 class AgentResponse(BaseModel):
@@ -15,31 +19,102 @@ class AgentResponse(BaseModel):
     data: Optional[Dict] = None
 
 # --- 2. KNOWLEDGE GRAPH MEMORY (GraphRAG) ---
+# Each patient's history events are tokenized once, on insert, into a
+# per-patient inverted index (type, doctor and note words -> postings sorted
+# by date). Queries intersect postings, slice date ranges with bisect and
+# read "latest N" from the end of a list; events are never re-stringified.
+STOPWORDS = {
+    "a", "an", "the", "my", "me", "i", "was", "is", "did", "do", "have", "had", "when", "what", "how",
+    "of", "for", "with", "on", "in", "at", "to", "and", "or", "last", "latest", "previous", "past",
+    "history", "record", "records", "done", "show", "list", "since", "after", "before", "until", "from"
+}
+
+def tokenize(text: str) -> List[str]:
+    # Lower-cased words with a naive plural strip ("checkups" -> "checkup")
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in re.findall(r"[a-z0-9]+", text.lower())]
+
 class DentalGraphRAG:
     def __init__(self):
         # Central Nodes: Patients | Satellite Nodes: History
-        self.graph = {
-            "PATIENT_89201": {
-                "name": "Ali Khan",
-                "history": [
-                    {"date": "2024-12-01", "type": "Checkup", "doctor": "Dr. Sarah", "notes": "Sensitivity in molar"},
-                    {"date": "2024-12-12", "type": "Root Canal", "doctor": "Dr. Bilal", "notes": "Completed successfully"}
-                ]
-            }
-        }
+        self.graph = {}
+        self._postings: Dict[str, Dict[str, List[tuple]]] = {} # patient -> term -> [(date, seq)]
+        self._types: Dict[str, Dict[str, List[tuple]]] = {} # patient -> type (lower) -> [(date, seq)]
+        self._events: Dict[str, List[dict]] = {} # patient -> events by seq
+        self._timeline: Dict[str, List[tuple]] = {} # patient -> [(date, seq)] of every event
+        self.type_names: Dict[str, tuple] = {} # every treatment type seen -> its tokens
+        self.add_patient("PATIENT_89201", "Ali Khan")
+        self.add_event("PATIENT_89201", {"date": "2024-12-01", "type": "Checkup", "doctor": "Dr. Sarah", "notes": "Sensitivity in molar"})
+        self.add_event("PATIENT_89201", {"date": "2024-12-12", "type": "Root Canal", "doctor": "Dr. Bilal", "notes": "Completed successfully"})
+
+    # --- INDEX MAINTENANCE ---
+    def add_patient(self, patient_id: str, name: str):
+        self.graph[patient_id] = {"name": name, "history": []}
+        self._postings[patient_id] = {}
+        self._types[patient_id] = {}
+        self._events[patient_id] = []
+        self._timeline[patient_id] = []
+
+    def add_event(self, patient_id: str, event: dict):
+        events = self._events[patient_id]
+        key = (event["date"], len(events))
+        events.append(event)
+        # History stays date-ordered for readers of the raw graph
+        insort(self.graph[patient_id]["history"], event, key=lambda e: e["date"])
+        insort(self._timeline[patient_id], key)
+        for term in set(tokenize(f"{event['type']} {event['doctor']} {event['notes']}")):
+            insort(self._postings[patient_id].setdefault(term, []), key)
+        event_type = event["type"].lower()
+        insort(self._types[patient_id].setdefault(event_type, []), key)
+        self.type_names.setdefault(event_type, tuple(tokenize(event_type)))
+
+    # --- READS ---
+    @staticmethod
+    def _date_slice(postings: List[tuple], date_from: Optional[str], date_to: Optional[str]) -> List[tuple]:
+        lo = bisect_left(postings, (date_from, -1)) if date_from else 0
+        hi = bisect_right(postings, (date_to, float("inf"))) if date_to else len(postings)
+        return postings[lo:hi]
+
+    def search(self, patient_id: str, terms: List[str], date_from: Optional[str] = None,
+               date_to: Optional[str] = None, limit: Optional[int] = None) -> List[dict]:
+        # Events containing every term, newest first
+        index = self._postings.get(patient_id)
+        if not index:
+            return []
+        if terms:
+            lists = sorted((index.get(t, []) for t in terms), key=len)
+            others = [set(l) for l in lists[1:]]
+            hits = [k for k in self._date_slice(lists[0], date_from, date_to) if all(k in o for o in others)]
+        else:
+            hits = self._date_slice(self._timeline[patient_id], date_from, date_to)
+        hits = hits[::-1][:limit]
+        return [self._events[patient_id][seq] for _, seq in hits]
+
+    def latest(self, patient_id: str, event_type: str, n: Optional[int] = 1, date_from: Optional[str] = None,
+               date_to: Optional[str] = None) -> List[dict]:
+        # Latest N events of one treatment type (all of them for n=None), newest first
+        postings = self._types.get(patient_id, {}).get(event_type.lower(), [])
+        hits = self._date_slice(postings, date_from, date_to)
+        hits = (hits[-n:] if n else hits)[::-1]
+        return [self._events[patient_id][seq] for _, seq in hits]
+
+    def has_term(self, patient_id: str, term: str) -> bool:
+        return term in self._postings.get(patient_id, {})
+
+    def types_in(self, text: str) -> List[str]:
+        # Treatment types named in the text ("root canals" -> "root canal")
+        words = set(tokenize(text))
+        return [t for t, tokens in self.type_names.items() if tokens and all(w in words for w in tokens)]
 
     def query_history(self, patient_id: str, query_concept: str) -> str:
         if patient_id not in self.graph:
             return "No history found."
         
-        patient_node = self.graph[patient_id]
-        history_nodes = patient_node["history"]
+        history_nodes = self.graph[patient_id]["history"]
+        if not history_nodes:
+            return "No history found."
         
-        relevant_facts = []
-        for event in history_nodes:
-            # Semantic-like matching
-            if query_concept.lower() in str(event).lower():
-                relevant_facts.append(f"On {event['date']}, {event['type']} with {event['doctor']}: {event['notes']}")
+        matches = self.search(patient_id, [t for t in tokenize(query_concept) if t not in STOPWORDS])
+        relevant_facts = [f"On {e['date']}, {e['type']} with {e['doctor']}: {e['notes']}" for e in reversed(matches)]
         
         if not relevant_facts:
             # If no specific concept found, return latest event
@@ -50,11 +125,15 @@ class DentalGraphRAG:
 
 # --- 3. THE AGENT CLASS (ReAct) ---
 class AppointmentAgent:
-    def __init__(self):
+    def __init__(self, calendar: Optional[Callable[[str, Optional[UUID]], List[str]]] = None):
         self.name = "Scheduling Bot"
         self.memory = DentalGraphRAG()
+        # Injected by the API: (date_str, doctor_id) -> free slot labels from the slot index
+        self.calendar = calendar
 
-    def _check_calendar(self, date_str: str):
+    def _check_calendar(self, date_str: str, doctor_id: Optional[UUID] = None):
+        if self.calendar:
+            return self.calendar(date_str, doctor_id)
         return ["10:00 AM", "02:00 PM", "04:30 PM"]
 
     def _triage_symptom(self, symptom: str):
@@ -63,6 +142,48 @@ class AppointmentAgent:
             urgency = "Emergency"
         return urgency
 
+    def _date_range(self, query: str):
+        # "since 2024-12-05" / "before 2024-12-10" / "in 2024"
+        date_from = date_to = None
+        for word, day in re.findall(r"(since|after|from|before|until)\s+(\d{4}-\d{2}-\d{2})", query):
+            if word in ("since", "after", "from"):
+                date_from = day
+            else:
+                date_to = day
+        year = re.search(r"\bin (\d{4})\b", query)
+        if year and not (date_from or date_to):
+            date_from, date_to = f"{year.group(1)}-01-01", f"{year.group(1)}-12-31"
+        return date_from, date_to
+
+    def _answer_history(self, patient_id: str, query: str) -> str:
+        if patient_id not in self.memory.graph or not self.memory.graph[patient_id]["history"]:
+            return "No history found."
+        date_from, date_to = self._date_range(query)
+        count = re.search(r"\b(?:last|latest) (\d+)\b", query)
+        n = int(count.group(1)) if count else None
+
+        types = self.memory.types_in(query)
+        if types:
+            # "latest N of type X": one postings-list slice per type
+            # "my last root canal" means one; "root canal history" means all of them
+            per_type = n or (1 if "last" in query or "latest" in query else None)
+            events = []
+            for t in types:
+                events.extend(self.memory.latest(patient_id, t, per_type, date_from, date_to))
+            events.sort(key=lambda e: e["date"], reverse=True)
+        else:
+            type_words = {w for tokens in self.memory.type_names.values() for w in tokens}
+            terms = [t for t in tokenize(re.sub(r"\d{4}(-\d{2}-\d{2})?", " ", query)) if t not in STOPWORDS and not t.isdigit()]
+            terms = [t for t in terms if t in type_words or self.memory.has_term(patient_id, t)]
+            events = self.memory.search(patient_id, terms, date_from, date_to, limit=n)
+            if not terms and not (date_from or date_to or n):
+                events = events[:1]
+
+        if not events:
+            latest = self.memory.graph[patient_id]["history"][-1]
+            return f"I couldn't find a matching visit, but your last visit was on {latest['date']} for {latest['type']}."
+        return "\n".join(f"On {e['date']}, {e['type']} with {e['doctor']}: {e['notes']}" for e in events)
+
     # --- REASONING ENGINE (Updated Logic) ---
     def process_request(self, input_data: AgentInput) -> AgentResponse:
         query = input_data.user_query.lower()
@@ -71,12 +192,8 @@ class AppointmentAgent:
         # A. History Query (GraphRAG Trigger) - IMPROVED MATCHING
         # Now catches: "when was", "last time", "history", "previous", "record"
         if any(w in query for w in ["history", "last", "previous", "record", "when", "past", "done"]):
-            concept = ""
-            if "root canal" in query: concept = "root canal"
-            elif "checkup" in query: concept = "checkup"
-            elif "cleaning" in query: concept = "cleaning"
-            
-            observation = self.memory.query_history(patient_id, concept)
+            # Concept extraction from the history index: known treatment types, else free terms
+            observation = self._answer_history(patient_id, query)
             return AgentResponse(
                 response_text=f"According to your records: {observation}",
                 action_taken="queried"
@@ -93,7 +210,13 @@ class AppointmentAgent:
                     data={"priority": "high"}
                 )
             
-            slots = self._check_calendar("today")
+            slots = self._check_calendar("today", input_data.doctor_id)
+            if not slots:
+                return AgentResponse(
+                    response_text="There are no free slots left today. Would you like me to check tomorrow?",
+                    action_taken="none",
+                    data={"slots": []}
+                )
             return AgentResponse(
                 response_text=f"I can book you for a checkup. Available slots today: {', '.join(slots)}.",
                 action_taken="none",
@@ -115,4 +238,10 @@ if __name__ == "__main__":
     print("\n--- Test 1: History Query (Retry) ---")
     req1 = AgentInput(user_query="When was my last root canal?", session_id="123")
     res1 = agent.process_request(req1)
-    print(f"Agent: {res1.response_text}")
\ No newline at end of file
+    print(f"Agent: {res1.response_text}")
+
+    # Multi-term / date-range queries over the history index
+    agent.memory.add_event("PATIENT_89201", {"date": "2025-03-02", "type": "Checkup", "doctor": "Dr. Sarah", "notes": "Molar sensitivity resolved"})
+    for q in ["Show my last 2 checkups", "When did Dr. Sarah note molar sensitivity?", "What was done in 2024?", "History since 2024-12-05"]:
+        print(f"\n--- {q} ---")
+        print(f"Agent: {agent.process_request(AgentInput(user_query=q, session_id='123')).response_text}")
\ No newline at end of file
@@ -1,5 +1,6 @@
 import json
-from typing import List, Optional, Dict
+import re
+from typing import Callable, List, Optional, Dict, Set
 from pydantic import BaseModel
 
 # --- 1. STRUCTURED I/O ---
@@ -14,101 +15,232 @@ class CaseResponse(BaseModel):
 
 # --- 2. KNOWLEDGE GRAPH MEMORY (GraphRAG) ---
 # Topology: Star Graph centered on TREATMENT_CASE nodes
-class ClinicalGraph:
-    def __init__(self):
-        self.graph = {
-            "PAT_89201": { # Ali Khan
-                "name": "Ali Khan",
-                "active_cases": [
-                    {
-                        "case_id": "CASE_501",
-                        "type": "Ceramic Crown (Tooth 14)",
-                        "stage": "Lab Processing",
-                        "start_date": "2024-12-01",
-                        "lab_order_id": "LAB_9901",
-                        "next_milestone": "Cementation"
-                    }
-                ]
-            },
-            "PAT_89202": { # Sara Ahmed
-                "name": "Sara Ahmed",
-                "active_cases": [
-                    {
-                        "case_id": "CASE_502",
-                        "type": "Orthodontic Aligners",
-                        "stage": "Initial Impression",
-                        "start_date": "2024-12-10",
-                        "lab_order_id": "None",
-                        "next_milestone": "Treatment Plan Review"
-                    }
-                ]
+# Patients and cases are indexed on insert: patient name tokens, case_id,
+# stage, lab_order_id and case-type tokens, so lookups walk posting sets
+# instead of every patient node.
+DEMO_PATIENTS = {
+    "PAT_89201": {
+        "name": "Ali Khan",
+        "active_cases": [
+            {
+                "case_id": "CASE_501",
+                "type": "Ceramic Crown (Tooth 14)",
+                "stage": "Lab Processing",
+                "start_date": "2024-12-01",
+                "lab_order_id": "LAB_9901",
+                "next_milestone": "Cementation"
             }
-        }
+        ]
+    },
+    "PAT_89202": {
+        "name": "Sara Ahmed",
+        "active_cases": [
+            {
+                "case_id": "CASE_502",
+                "type": "Orthodontic Aligners",
+                "stage": "Initial Impression",
+                "start_date": "2024-12-10",
+                "lab_order_id": "None",
+                "next_milestone": "Treatment Plan Review"
+            }
+        ]
+    },
+    "PAT_89203": {
+        "name": "Usman Ghani",
+        "active_cases": [
+            {
+                "case_id": "CASE_503",
+                "type": "Zirconia Crown (Tooth 36)",
+                "stage": "Lab Processing",
+                "start_date": "2024-12-10",
+                "lab_order_id": "LAB_9902",
+                "next_milestone": "Try-in"
+            }
+        ]
+    }
+}
+
+def tokenize(text: str) -> List[str]:
+    # Lower-cased words with a naive plural strip ("crowns" -> "crown")
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in re.findall(r"[a-z0-9]+", text.lower())]
+
+class ClinicalGraph:
+    def __init__(self, patients: Optional[Dict[str, dict]] = None):
+        self.graph: Dict[str, dict] = {}
+        self._name_tokens: Dict[str, Set[str]] = {} # token -> patient ids
+        self._cases: Dict[str, str] = {} # case_id -> patient id
+        self._by_stage: Dict[str, Dict[str, None]] = {} # stage (lower) -> case ids
+        self._stage_tokens: Dict[str, Set[str]] = {} # token -> stages (lower)
+        self._by_lab_order: Dict[str, str] = {} # lab_order_id -> case_id
+        self._type_tokens: Dict[str, Set[str]] = {} # token -> case ids
+        for pat_id, data in (DEMO_PATIENTS if patients is None else patients).items():
+            self.add_patient(pat_id, data["name"])
+            for case in data["active_cases"]:
+                self.add_case(pat_id, case)
+
+    # --- INDEX MAINTENANCE ---
+    def add_patient(self, pat_id: str, name: str):
+        self.graph[pat_id] = {"name": name, "active_cases": []}
+        for token in tokenize(name):
+            self._name_tokens.setdefault(token, set()).add(pat_id)
+
+    def add_case(self, pat_id: str, case: dict) -> dict:
+        case = dict(case)
+        self.graph[pat_id]["active_cases"].append(case)
+        self._cases[case["case_id"]] = pat_id
+        self._link_stage(case)
+        if case.get("lab_order_id") not in (None, "None"):
+            self._by_lab_order[case["lab_order_id"]] = case["case_id"]
+        for token in tokenize(case["type"]):
+            self._type_tokens.setdefault(token, set()).add(case["case_id"])
+        return case
+
+    def _link_stage(self, case: dict):
+        stage = case["stage"].lower()
+        self._by_stage.setdefault(stage, {})[case["case_id"]] = None
+        for token in tokenize(stage):
+            self._stage_tokens.setdefault(token, set()).add(stage)
+
+    def set_stage(self, case_id: str, stage: str) -> dict:
+        case = self.get_case(case_id)
+        ids = self._by_stage.get(case["stage"].lower(), {})
+        ids.pop(case_id, None)
+        case["stage"] = stage
+        self._link_stage(case)
+        return case
+
+    # --- READS ---
+    def _with_context(self, pat_id: str, case: dict) -> dict:
+        # Context Enrichment: Add patient name to case data
+        case_with_context = case.copy()
+        case_with_context["patient_name"] = self.graph[pat_id]["name"]
+        return case_with_context
+
+    def get_case(self, case_id: str) -> dict:
+        pat_id = self._cases[case_id]
+        return next(c for c in self.graph[pat_id]["active_cases"] if c["case_id"] == case_id)
+
+    def find_patients(self, text: str) -> List[str]:
+        # Patients whose name shares a word with the text (entity extraction)
+        found: Dict[str, None] = {}
+        for token in tokenize(text):
+            for pat_id in self._name_tokens.get(token, ()):
+                found[pat_id] = None
+        return list(found)
 
     def query_cases(self, patient_name_query: str) -> List[dict]:
         """
         Graph Traversal: Finds Patient Node -> Traverses to Active Case Nodes.
+        Every query word must match a word of the patient's name.
         """
-        results = []
-        for pat_id, data in self.graph.items():
-            if patient_name_query.lower() in data["name"].lower():
-                # Context Enrichment: Add patient name to case data
-                for case in data["active_cases"]:
-                    case_with_context = case.copy()
-                    case_with_context["patient_name"] = data["name"]
-                    results.append(case_with_context)
-        return results
+        tokens = tokenize(patient_name_query)
+        if not tokens:
+            return []
+        postings = sorted((self._name_tokens.get(t, set()) for t in tokens), key=len)
+        patients = set(postings[0]).intersection(*postings[1:])
+        return [self._with_context(pat_id, case) for pat_id in patients for case in self.graph[pat_id]["active_cases"]]
+
+    def cases_for_patients(self, pat_ids: List[str]) -> List[dict]:
+        return [self._with_context(pat_id, case) for pat_id in pat_ids for case in self.graph[pat_id]["active_cases"]]
+
+    def stages_in(self, text: str) -> List[str]:
+        # Stages named in the text ("lab" -> "lab processing")
+        found: Dict[str, None] = {}
+        for token in tokenize(text):
+            for stage in self._stage_tokens.get(token, ()):
+                found[stage] = None
+        return list(found)
+
+    def list_cases(self, stage: Optional[str] = None, type_term: Optional[str] = None) -> List[dict]:
+        # All cases in a stage, optionally narrowed to a case type word ("crown")
+        ids = None
+        if stage:
+            ids = set(self._by_stage.get(stage.lower(), {}))
+        if type_term:
+            for token in tokenize(type_term):
+                typed = self._type_tokens.get(token, set())
+                ids = set(typed) if ids is None else ids & typed
+        if ids is None:
+            ids = set(self._cases)
+        return [self._with_context(self._cases[cid], self.get_case(cid)) for cid in sorted(ids)]
+
+    def case_types_in(self, text: str) -> List[str]:
+        return [t for t in tokenize(text) if t in self._type_tokens]
+
+    def case_by_lab_order(self, lab_order_id: str) -> Optional[dict]:
+        case_id = self._by_lab_order.get(lab_order_id)
+        return self._with_context(self._cases[case_id], self.get_case(case_id)) if case_id else None
 
 # --- 3. THE AGENT CLASS (ReAct Pattern) ---
 class CaseTrackingAgent:
-    def __init__(self):
+    def __init__(self, memory: Optional[ClinicalGraph] = None,
+                 lab_lookup: Optional[Callable[[List[str]], Dict[str, str]]] = None):
         self.name = "Clinical Case Manager"
-        self.memory = ClinicalGraph()
+        self.memory = memory or ClinicalGraph()
+        # The API injects a batched lab API lookup (lab_client.py); standalone runs use the mock
+        self.lab_lookup = lab_lookup
 
     # --- TOOLS ---
     def _check_lab_status(self, order_id: str) -> str:
+        return self._check_lab_statuses([order_id])[order_id]
+
+    def _check_lab_statuses(self, order_ids: List[str]) -> Dict[str, str]:
+        # One batched call per request
+        if self.lab_lookup:
+            return self.lab_lookup(order_ids)
         # Mock External Lab API
         mock_lab_db = {
             "LAB_9901": "Shipped (Arriving Tomorrow)",
             "LAB_9902": "Processing"
         }
-        return mock_lab_db.get(order_id, "Order Not Found")
+        return {order_id: mock_lab_db.get(order_id, "Order Not Found") for order_id in order_ids}
+
+    def _lab_statuses_for(self, cases: List[dict]) -> Dict[str, str]:
+        # Deduplicate lab orders across the cases, then look them all up at once
+        order_ids = list(dict.fromkeys(c["lab_order_id"] for c in cases if c["lab_order_id"] != "None"))
+        return self._check_lab_statuses(order_ids) if order_ids else {}
 
     # --- REASONING ENGINE ---
     def process_request(self, input_data: CaseInput) -> CaseResponse:
         query = input_data.user_query.lower()
         
         # Step 1: ENTITY EXTRACTION
-        # Identify Patient Name from query
-        target_patient = None
-        if "ali" in query: target_patient = "Ali"
-        elif "sara" in query: target_patient = "Sara"
+        # Patient named in the query (name index), else the explicit patient_id
+        patient_ids = self.memory.find_patients(query)
+        if not patient_ids and input_data.patient_id in self.memory.graph:
+            patient_ids = [input_data.patient_id]
         
-        if not target_patient:
+        if not patient_ids:
+            # Catalog-wide question: "which crowns are still at the lab?"
+            stages = self.memory.stages_in(query)
+            types = self.memory.case_types_in(query)
+            if stages or types:
+                return self._list_cases(stages, types)
             return CaseResponse(
                 response_text="Please specify a patient name. Example: 'Status of Ali's crown?'",
                 case_status="Unknown"
             )
 
         # Step 2: GRAPH LOOKUP
-        cases = self.memory.query_cases(target_patient)
+        cases = self.memory.cases_for_patients(patient_ids)
         
         if not cases:
+            names = ", ".join(self.memory.graph[p]["name"] for p in patient_ids)
             return CaseResponse(
-                response_text=f"No active medical cases found for {target_patient}.",
+                response_text=f"No active medical cases found for {names}.",
                 case_status="None"
             )
 
         # Step 3: ANALYTICAL REASONING (Case Specific)
         response_lines = []
         overall_status = "Active"
+        lab_intent = any(w in query for w in ["lab", "ready", "crown", "status", "where"])
+        lab_statuses = self._lab_statuses_for(cases) if lab_intent else {}
         
         for case in cases:
             # Intent A: Lab Status Check
-            if any(w in query for w in ["lab", "ready", "crown", "status", "where"]):
-                lab_status = "N/A"
-                if case['lab_order_id'] != "None":
-                    lab_status = self._check_lab_status(case['lab_order_id'])
+            if lab_intent:
+                lab_status = lab_statuses.get(case['lab_order_id'], "N/A")
                 
                 response_lines.append(
                     f"**Case:** {case['type']}\n"
@@ -133,6 +265,27 @@ class CaseTrackingAgent:
             next_step=cases[0]['next_milestone']
         )
 
+    def _list_cases(self, stages: List[str], types: List[str]) -> CaseResponse:
+        type_term = " ".join(types) or None
+        cases = []
+        for stage in stages or [None]:
+            cases.extend(self.memory.list_cases(stage=stage, type_term=type_term))
+        label = " / ".join(types) or "case"
+        where = " or ".join(s.title() for s in stages) if stages else "any stage"
+        if not cases:
+            return CaseResponse(response_text=f"No {label}s in {where}.", case_status="None")
+        lab_statuses = self._lab_statuses_for(cases)
+        lines = [
+            f"- {c['patient_name']}: {c['type']} ({c['stage']})"
+            + (f", Lab: {lab_statuses[c['lab_order_id']]}" if c['lab_order_id'] in lab_statuses else "")
+            for c in cases
+        ]
+        return CaseResponse(
+            response_text=f"**{len(cases)} {label}(s) in {where}:**\n" + "\n".join(lines),
+            case_status="Active",
+            next_step=cases[0]['next_milestone']
+        )
+
 # --- 4. TESTING BLOCK ---
 if __name__ == "__main__":
     agent = CaseTrackingAgent()
@@ -148,4 +301,10 @@ if __name__ == "__main__":
     print("\n--- Test 2: Treatment Stage ---")
     req2 = CaseInput(user_query="What stage is Sara at?")
     res2 = agent.process_request(req2)
-    print(f"Agent:\n{res2.response_text}")
\ No newline at end of file
+    print(f"Agent:\n{res2.response_text}")
+
+    # Test 3: Stage listing across patients (index lookup + one batched lab call)
+    print("\n--- Test 3: Crowns at the Lab ---")
+    req3 = CaseInput(user_query="Which crowns are still at the lab?")
+    res3 = agent.process_request(req3)
+    print(f"Agent:\n{res3.response_text}")
\ No newline at end of file
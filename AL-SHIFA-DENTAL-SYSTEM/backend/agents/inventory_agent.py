@@ -1,6 +1,12 @@
+import heapq
 import json
+import re
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from itertools import groupby
 from datetime import date, timedelta
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from pydantic import BaseModel
 
 # --- 1. STRUCTURED I/O (Pydantic Models) ---
@@ -13,7 +19,202 @@ class InventoryResponse(BaseModel):
     alert_level: str  # "Critical", "Warning", "Stable"
     action_suggested: str # "Reorder", "None", "Check Expiry"
 
-# --- 2. KNOWLEDGE GRAPH MEMORY (GraphRAG) ---
+# --- 2. ITEM NAME INDEX ---
+# Built once per graph snapshot and patched per item on add/rename: token -> items
+# (inverted index), a sorted token list for prefix lookups and token trigrams for
+# typo-tolerant matches. A query only touches the vocabulary, never the item list.
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class ItemNameIndex:
+    EXACT, PREFIX, FUZZY_WEIGHT, FUZZY_MIN = 1.0, 0.8, 0.9, 0.45
+
+    def __init__(self, names: Dict[str, str]):
+        self.names = dict(names)
+        postings = defaultdict(set)
+        for key, name in names.items():
+            for token in tokenize(name):
+                postings[token].add(key)
+        self.postings = {token: frozenset(keys) for token, keys in postings.items()}
+        self.vocab = sorted(self.postings)
+        self.token_grams = {token: trigrams(token) for token in self.vocab}
+        gram_tokens = defaultdict(set)
+        for token, grams in self.token_grams.items():
+            for g in grams:
+                gram_tokens[g].add(token)
+        self.gram_tokens = defaultdict(frozenset, {g: frozenset(tokens) for g, tokens in gram_tokens.items()})
+        # Tie-break order for equal scores: shorter (more specific) names first
+        self.rank = {key: (len(name), name, key) for key, name in names.items()}
+        self.ranked_postings = {token: sorted(keys, key=self.rank.__getitem__) for token, keys in self.postings.items()}
+        # update_item() and search() hold it, so a search never sees a half-applied update
+        self._lock = threading.Lock()
+
+    def update_item(self, key: str, name: Optional[str]):
+        # Re-index one item after it was added or renamed (name=None removes it)
+        with self._lock:
+            old = self.names.pop(key, None)
+            if old is not None:
+                for token in set(tokenize(old)):
+                    keys = self.postings[token] - {key}
+                    if keys:
+                        self.postings[token] = keys
+                        self.ranked_postings[token].remove(key)
+                    else:
+                        self._drop_token(token)
+                del self.rank[key]
+            if name is None:
+                return
+            self.names[key] = name
+            self.rank[key] = (len(name), name, key)
+            for token in set(tokenize(name)):
+                if token in self.postings:
+                    self.postings[token] = self.postings[token] | {key}
+                    insort(self.ranked_postings[token], key, key=self.rank.__getitem__)
+                else:
+                    self._add_token(token, key)
+
+    def _add_token(self, token: str, key: str):
+        self.postings[token] = frozenset((key,))
+        self.ranked_postings[token] = [key]
+        insort(self.vocab, token)
+        self.token_grams[token] = trigrams(token)
+        for g in self.token_grams[token]:
+            self.gram_tokens[g] = self.gram_tokens[g] | {token}
+
+    def _drop_token(self, token: str):
+        del self.postings[token]
+        del self.ranked_postings[token]
+        del self.vocab[bisect_left(self.vocab, token)]
+        for g in self.token_grams.pop(token):
+            self.gram_tokens[g] = self.gram_tokens[g] - {token}
+
+    def _token_matches(self, q: str) -> Dict[str, float]:
+        # Vocabulary tokens similar to q, with a score in (0, 1]
+        matches = {}
+        if q in self.postings:
+            matches[q] = self.EXACT
+        if len(q) >= 2:
+            i = bisect_left(self.vocab, q)
+            while i < len(self.vocab) and self.vocab[i].startswith(q):
+                matches.setdefault(self.vocab[i], self.PREFIX)
+                i += 1
+        if len(q) >= 3:
+            grams = trigrams(q)
+            shared = Counter(t for g in grams for t in self.gram_tokens.get(g, ()))
+            for token, n in shared.items():
+                similarity = n / (len(grams) + len(self.token_grams[token]) - n)
+                if similarity >= self.FUZZY_MIN:
+                    matches[token] = max(matches.get(token, 0.0), round(similarity * self.FUZZY_WEIGHT, 3))
+        return matches
+
+    def search(self, query: str, limit: int = 10, min_token_score: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        Ranked (item_key, score) for a free-text query. Each query token adds the
+        score of its best-matching name token; tokens scoring below
+        `min_token_score` (filler words in a chat message) are ignored. Items
+        matching every remaining token are preferred; if none do, any match counts.
+        """
+        with self._lock:
+            return self._search(query, limit, min_token_score)
+
+    def _search(self, query: str, limit: int, min_token_score: float) -> List[Tuple[str, float]]:
+        per_token = []
+        for q in set(tokenize(query)):
+            matches = {t: sc for t, sc in self._token_matches(q).items() if sc >= min_token_score}
+            if matches:
+                # Best score first, so each item is credited once at its best match
+                per_token.append(sorted(matches.items(), key=lambda kv: -kv[1]))
+        if not per_token:
+            return []
+        if len(per_token) == 1:
+            return self._single_token_top(per_token[0], limit)
+
+        # Candidate generation with C-level set operations
+        covers = [frozenset().union(*(self.postings[t] for t, _ in matches)) for matches in per_token]
+        candidates = frozenset.intersection(*covers) or frozenset().union(*covers)
+
+        scores = dict.fromkeys(candidates, 0.0)
+        for matches in per_token:
+            remaining = candidates
+            for token, score in matches:
+                hit = remaining & self.postings[token]
+                if not hit:
+                    continue
+                remaining = remaining - hit
+                for key in hit:
+                    scores[key] += score
+        tiers = defaultdict(set)
+        for key, score in scores.items():
+            tiers[round(score, 3)].add(key)
+
+        results = []
+        for score in sorted(tiers, reverse=True):
+            tier = tiers[score]
+            take = heapq.nsmallest(limit - len(results), tier, key=self.rank.__getitem__)
+            results.extend((key, score) for key in take)
+            if len(results) >= limit:
+                break
+        return results
+
+    def _single_token_top(self, matches: List[Tuple[str, float]], limit: int) -> List[Tuple[str, float]]:
+        # Walk pre-ranked posting lists tier by tier; stops after `limit` items
+        results, seen = [], set()
+        for score, group in groupby(matches, key=lambda kv: kv[1]):
+            lists = [self.ranked_postings[token] for token, _ in group]
+            for key in heapq.merge(*lists, key=self.rank.__getitem__):
+                if key in seen:
+                    continue
+                seen.add(key)
+                results.append((key, score))
+                if len(results) >= limit:
+                    return results
+        return results
+
+# --- 3. BATCH EXPIRY INDEX (FEFO) ---
+# Every batch in the catalog as one sorted list of (expiry, item_id, batch_id, qty).
+# ISO dates sort correctly as strings, so "expiring before D" is a bisect plus a
+# slice, and updating one item only touches that item's entries.
+class ExpiryIndex:
+    def __init__(self, graph: Dict[str, dict]):
+        self._entries = []
+        self._by_item = {}
+        for item_id, data in graph.items():
+            entries = self._item_entries(item_id, data)
+            self._by_item[item_id] = entries
+            self._entries.extend(entries)
+        self._entries.sort()
+
+    @staticmethod
+    def _item_entries(item_id: str, data: dict) -> List[tuple]:
+        return [(b["expiry"], item_id, b["batch_id"], b["qty"]) for b in data["batches"] if b["qty"] > 0]
+
+    def update_item(self, item_id: str, data: Optional[dict]):
+        # Re-index one item after its batches changed (data=None removes it)
+        for entry in self._by_item.pop(item_id, []):
+            i = bisect_left(self._entries, entry)
+            if i < len(self._entries) and self._entries[i] == entry:
+                del self._entries[i]
+        if data is not None:
+            entries = self._item_entries(item_id, data)
+            for entry in entries:
+                insort(self._entries, entry)
+            self._by_item[item_id] = entries
+
+    def expiring_before(self, cutoff: str) -> List[tuple]:
+        # All batches with expiry <= cutoff (ISO date), earliest first
+        return self._entries[:bisect_right(self._entries, (cutoff, chr(0x10FFFF)))]
+
+    def fefo(self, item_id: str) -> List[tuple]:
+        # One item's batches in first-expiry-first-out order
+        return sorted(self._by_item.get(item_id, []))
+
+# --- 4. KNOWLEDGE GRAPH MEMORY (GraphRAG) ---
 # Implementing Star Graph Topology for high-precision retrieval
 class SupplyChainGraph:
     def __init__(self):
@@ -43,21 +244,74 @@ class SupplyChainGraph:
             }
         }
 
+    @property
+    def name_index(self) -> ItemNameIndex:
+        # Rebuilt whenever the graph dict is replaced (the DB-backed graph maintains its own)
+        graph = self.graph
+        cached = getattr(self, "_name_index", None)
+        if cached is None or cached[0] is not graph:
+            cached = (graph, ItemNameIndex({item_id: data["name"] for item_id, data in graph.items()}))
+            self._name_index = cached
+        return cached[1]
+
+    @property
+    def expiry_index(self) -> ExpiryIndex:
+        graph = self.graph
+        cached = getattr(self, "_expiry_index", None)
+        if cached is None or cached[0] is not graph:
+            cached = (graph, ExpiryIndex(graph))
+            self._expiry_index = cached
+        return cached[1]
+
+    def expiring_within(self, days: int, today: Optional[date] = None) -> List[dict]:
+        # Batches expiring in the next `days` days (already expired ones included), earliest first
+        today = today or date.today()
+        graph = self.graph
+        results = []
+        for expiry, item_id, batch_id, qty in self.expiry_index.expiring_before((today + timedelta(days=days)).isoformat()):
+            results.append({
+                "item_id": item_id,
+                "name": graph[item_id]["name"] if item_id in graph else item_id,
+                "batch_id": batch_id,
+                "expiry": expiry,
+                "qty": qty,
+                "days_left": (date.fromisoformat(expiry) - today).days
+            })
+        return results
+
+    def forecast_item(self, key: str) -> Optional[dict]:
+        # History-based forecast (daily_usage, runout_days, ...); the demo graph has none
+        return None
+
+    def search_items(self, query: str, limit: int = 10, min_token_score: float = 0.0) -> List[Tuple[str, float]]:
+        return self.name_index.search(query, limit, min_token_score)
+
+    def find_item(self, text: str) -> Optional[Tuple[str, dict]]:
+        """
+        Entity extraction: best-matching item for a chat message, or None.
+        Only confident token matches count, so filler words are ignored.
+        """
+        graph = self.graph
+        hits = self.search_items(text, limit=1, min_token_score=0.5)
+        if not hits or hits[0][0] not in graph:
+            return None
+        return hits[0][0], graph[hits[0][0]]
+
     def query_graph(self, item_name_query: str) -> dict:
         """
-        Graph Traversal: Finds the node where 'name' matches the query.
+        Graph Traversal: Finds the node whose 'name' best matches the query.
         Returns the full star cluster (Central Node + Satellites).
         """
-        for item_id, data in self.graph.items():
-            if item_name_query.lower() in data["name"].lower():
-                return data
-        return None
+        graph = self.graph
+        hits = self.search_items(item_name_query, limit=1)
+        return graph.get(hits[0][0]) if hits else None
 
-# --- 3. THE AGENT CLASS (ReAct Pattern) ---
+# --- 5. THE AGENT CLASS (ReAct Pattern) ---
 class InventoryAgent:
-    def __init__(self):
+    def __init__(self, memory: Optional[SupplyChainGraph] = None):
         self.name = "SupplyChain Bot"
-        self.memory = SupplyChainGraph()
+        # The API injects a database-backed graph (inventory_store.py); standalone runs use the demo data
+        self.memory = memory or SupplyChainGraph()
 
     # --- TOOLS ---
     def _calculate_runout_days(self, stock: int, rate: float) -> int:
@@ -68,17 +322,11 @@ class InventoryAgent:
     def process_request(self, input_data: InventoryInput) -> InventoryResponse:
         query = input_data.user_query.lower()
         
-        # Step 1: ENTITY EXTRACTION (Simulated)
-        # Identify which item the user is talking about
-        target_item = None
-        if "lidocaine" in query: target_item = "Lidocaine"
-        elif "gloves" in query: target_item = "Gloves"
-        
-        # Step 2: GRAPH LOOKUP (Information Retrieval)
-        if target_item:
-            node_data = self.memory.query_graph(target_item)
-            if not node_data:
-                return InventoryResponse(response_text=f"Item '{target_item}' not found in Knowledge Graph.", alert_level="Stable", action_suggested="None")
+        # Step 1 + 2: ENTITY EXTRACTION & GRAPH LOOKUP
+        # Identify which catalog item the user is talking about (name index)
+        match = self.memory.find_item(query)
+        if match:
+            item_key, node_data = match
             
             # Context Enrichment (from GraphRAG logic)
             stock = node_data["stock"]
@@ -110,12 +358,27 @@ class InventoryAgent:
 
             # Scenario C: Predictive Analysis (Agentic Feature)
             if any(w in query for w in ["last", "enough", "predict", "run out", "days"]):
-                days_left = self._calculate_runout_days(stock, node_data["usage_rate"])
-                msg = f"At current usage rate ({node_data['usage_rate']}/day), {node_data['name']} will run out in approx **{days_left} days**."
+                forecast = self.memory.forecast_item(item_key)
+                if forecast:
+                    rate = forecast["daily_usage"]
+                    days_left = forecast["runout_days"] if forecast["runout_days"] is not None else 999
+                else:
+                    rate = node_data["usage_rate"]
+                    days_left = self._calculate_runout_days(stock, rate)
+                msg = f"At current usage rate ({rate}/day), {node_data['name']} will run out in approx **{days_left} days**."
                 if days_left < 7:
                     msg += " You should reorder this week."
                 return InventoryResponse(response_text=msg, alert_level="Warning" if days_left < 7 else "Stable", action_suggested="Check")
 
+        # Scenario D: Catalog-wide expiry check (no specific item)
+        if "expir" in query:
+            soon = self.memory.expiring_within(30)
+            if not soon:
+                return InventoryResponse(response_text="No batches expire in the next 30 days.", alert_level="Stable", action_suggested="None")
+            lines = ", ".join(f"{b['name']} {b['batch_id']} ({b['expiry']}, {b['qty']} units)" for b in soon[:10])
+            more = f" and {len(soon) - 10} more" if len(soon) > 10 else ""
+            return InventoryResponse(response_text=f"Expiring within 30 days: {lines}{more}.", alert_level="Warning", action_suggested="Check Expiry")
+
         # Fallback
         return InventoryResponse(
             response_text="I can track inventory, suppliers, and predict shortages. Ask me 'Do we have enough Lidocaine?'",
@@ -123,7 +386,7 @@ class InventoryAgent:
             action_suggested="None"
         )
 
-# --- 4. TESTING BLOCK ---
+# --- 6. TESTING BLOCK ---
 if __name__ == "__main__":
     agent = InventoryAgent()
     print("📦 Al-Shifa Supply Chain Agent (GraphRAG Enabled) Online...")
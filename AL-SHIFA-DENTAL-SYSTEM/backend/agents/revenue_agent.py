@@ -1,4 +1,5 @@
 import json
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime
 from typing import List, Optional, Dict
 from pydantic import BaseModel
@@ -15,67 +16,176 @@ class FinanceResponse(BaseModel):
 
 # --- 2. KNOWLEDGE GRAPH MEMORY (GraphRAG) ---
 # Topology: Star Graph centered on INVOICE nodes
+# Satellite attributes (status, procedure, patient, month) are kept as hash
+# indexes of insertion-ordered id sets, and paid/pending totals are running
+# sums, so reports never rescan the whole invoice list.
+DEMO_INVOICES = [
+    {"id": "INV_1001", "patient_id": "PAT_89201", "patient_name": "Ali Khan", "procedure": "Root Canal", "amount": 5000, "status": "Paid", "date": "2024-12-01"},
+    {"id": "INV_1002", "patient_id": "PAT_89202", "patient_name": "Sara Ahmed", "procedure": "Scaling", "amount": 2000, "status": "Pending", "date": "2024-12-05"},
+    {"id": "INV_1003", "patient_id": "PAT_89203", "patient_name": "Usman Ghani", "procedure": "Root Canal", "amount": 5000, "status": "Pending", "date": "2024-12-10"}
+]
+
 class FinancialGraph:
-    def __init__(self):
-        self.graph = {
-            "INV_1001": {
-                "id": "INV_1001",
-                "patient_id": "PAT_89201",
-                "patient_name": "Ali Khan",
-                "procedure": "Root Canal",
-                "amount": 5000,
-                "status": "Paid",
-                "date": "2024-12-01"
-            },
-            "INV_1002": {
-                "id": "INV_1002",
-                "patient_id": "PAT_89202",
-                "patient_name": "Sara Ahmed",
-                "procedure": "Scaling",
-                "amount": 2000,
-                "status": "Pending",
-                "date": "2024-12-05"
-            },
-            "INV_1003": {
-                "id": "INV_1003",
-                "patient_id": "PAT_89203",
-                "patient_name": "Usman Ghani",
-                "procedure": "Root Canal",
-                "amount": 5000,
-                "status": "Pending",
-                "date": "2024-12-10"
-            }
-        }
-
-    def query_invoices(self, status: Optional[str] = None, procedure: Optional[str] = None) -> List[dict]:
+    def __init__(self, invoices: Optional[List[dict]] = None):
+        self.graph: Dict[str, dict] = {}
+        self._by_status: Dict[str, Dict[str, None]] = {}
+        self._by_procedure: Dict[str, Dict[str, None]] = {}
+        self._by_patient: Dict[str, Dict[str, None]] = {}
+        self._by_month: Dict[str, Dict[str, None]] = {}
+        # Running sums keyed by (status, procedure), both lower-cased
+        self._totals: Dict[tuple, int] = {}
+        self._counts: Dict[tuple, int] = {}
+        # (date, id) of every invoice, ascending: keyset pages and date ranges are bisects
+        self._by_date: List[tuple] = []
+        for inv in DEMO_INVOICES if invoices is None else invoices:
+            self.add_invoice(inv)
+
+    # --- INDEX MAINTENANCE ---
+    @staticmethod
+    def _link(index: Dict[str, Dict[str, None]], key: str, inv_id: str):
+        index.setdefault(key, {})[inv_id] = None
+
+    @staticmethod
+    def _unlink(index: Dict[str, Dict[str, None]], key: str, inv_id: str):
+        ids = index.get(key)
+        if ids is not None:
+            ids.pop(inv_id, None)
+            if not ids:
+                del index[key]
+
+    def _account(self, inv: dict, sign: int):
+        key = (inv["status"].lower(), inv["procedure"].lower())
+        self._totals[key] = self._totals.get(key, 0) + sign * inv["amount"]
+        self._counts[key] = self._counts.get(key, 0) + sign
+
+    def add_invoice(self, invoice: dict) -> dict:
+        inv_id = invoice["id"]
+        if inv_id in self.graph:
+            self.remove_invoice(inv_id)
+        inv = dict(invoice)
+        self.graph[inv_id] = inv
+        self._link(self._by_status, inv["status"].lower(), inv_id)
+        self._link(self._by_procedure, inv["procedure"].lower(), inv_id)
+        self._link(self._by_patient, inv["patient_id"], inv_id)
+        self._link(self._by_month, inv["date"][:7], inv_id)
+        insort(self._by_date, (inv["date"], inv_id))
+        self._account(inv, 1)
+        return inv
+
+    def remove_invoice(self, inv_id: str) -> dict:
+        inv = self.graph.pop(inv_id)
+        self._unlink(self._by_status, inv["status"].lower(), inv_id)
+        self._unlink(self._by_procedure, inv["procedure"].lower(), inv_id)
+        self._unlink(self._by_patient, inv["patient_id"], inv_id)
+        self._unlink(self._by_month, inv["date"][:7], inv_id)
+        i = bisect_left(self._by_date, (inv["date"], inv_id))
+        if i < len(self._by_date) and self._by_date[i] == (inv["date"], inv_id):
+            del self._by_date[i]
+        self._account(inv, -1)
+        return inv
+
+    def set_status(self, inv_id: str, status: str) -> dict:
+        inv = self.graph[inv_id]
+        if inv["status"] != status:
+            self._account(inv, -1)
+            self._unlink(self._by_status, inv["status"].lower(), inv_id)
+            inv["status"] = status
+            self._link(self._by_status, status.lower(), inv_id)
+            self._account(inv, 1)
+        return inv
+
+    # --- READS ---
+    def _procedures(self, procedure: str) -> List[str]:
+        # Substring match over distinct procedure names (a handful), not invoices
+        procedure = procedure.lower()
+        return [p for p in self._by_procedure if procedure in p]
+
+    def total(self, status: str, procedure: Optional[str] = None) -> int:
+        status = status.lower()
+        procs = self._procedures(procedure) if procedure else self._by_procedure
+        return sum(self._totals.get((status, p), 0) for p in procs)
+
+    def count(self, status: str, procedure: Optional[str] = None) -> int:
+        status = status.lower()
+        procs = self._procedures(procedure) if procedure else self._by_procedure
+        return sum(self._counts.get((status, p), 0) for p in procs)
+
+    @property
+    def paid_total(self) -> int:
+        return self.total("Paid")
+
+    @property
+    def pending_total(self) -> int:
+        return self.total("Pending")
+
+    def query_invoices(self, status: Optional[str] = None, procedure: Optional[str] = None,
+                       patient_id: Optional[str] = None, month: Optional[str] = None,
+                       limit: Optional[int] = None) -> List[dict]:
         """
         Graph Traversal: Filters invoice nodes based on connected attributes.
+        Intersects the matching index sets, walking the smallest one.
         """
-        results = []
-        for inv_id, data in self.graph.items():
-            match = True
-            if status and data["status"].lower() != status.lower():
-                match = False
-            if procedure and procedure.lower() not in data["procedure"].lower():
-                match = False
-            
-            if match:
-                results.append(data)
-        return results
+        candidates = []
+        if status:
+            candidates.append(self._by_status.get(status.lower(), {}))
+        if procedure:
+            procs = self._procedures(procedure)
+            candidates.append(self._by_procedure[procs[0]] if len(procs) == 1 else {i: None for p in procs for i in self._by_procedure[p]})
+        if patient_id:
+            candidates.append(self._by_patient.get(patient_id, {}))
+        if month:
+            candidates.append(self._by_month.get(month, {}))
+        if not candidates:
+            return list(self.graph.values())[:limit]
+        candidates.sort(key=len)
+        smallest, rest = candidates[0], candidates[1:]
+        return [self.graph[i] for i in smallest if all(i in ids for ids in rest)][:limit]
+
+    def page_invoices(self, limit: int, after: Optional[tuple] = None, date_from: Optional[str] = None,
+                      date_to: Optional[str] = None, status: Optional[str] = None,
+                      procedure: Optional[str] = None) -> List[dict]:
+        """
+        Newest-first keyset page: invoices strictly before `after` = (date, id),
+        within [date_from, date_to] (ISO dates), matching status/procedure.
+        """
+        end = len(self._by_date)
+        if date_to:
+            end = bisect_right(self._by_date, (date_to, chr(0x10FFFF)))
+        if after:
+            end = min(end, bisect_left(self._by_date, after))
+        start = bisect_left(self._by_date, (date_from, "")) if date_from else 0
+        status_ids = self._by_status.get(status.lower(), {}) if status else None
+        procs = set(self._procedures(procedure)) if procedure else None
+        page = []
+        for i in range(end - 1, start - 1, -1):
+            inv = self.graph[self._by_date[i][1]]
+            if status_ids is not None and inv["id"] not in status_ids:
+                continue
+            if procs is not None and inv["procedure"].lower() not in procs:
+                continue
+            page.append(inv)
+            if len(page) == limit:
+                break
+        return page
+
+PENDING_LIST_LIMIT = 20
 
 # --- 3. THE AGENT CLASS (ReAct Pattern) ---
 class RevenueAgent:
-    def __init__(self):
+    def __init__(self, memory: Optional[FinancialGraph] = None):
         self.name = "Finance Controller"
-        self.memory = FinancialGraph()
+        # The API injects a database-backed graph (finance_store.py); standalone runs use the demo data
+        self.memory = memory or FinancialGraph()
 
     # --- TOOLS ---
     def _calculate_total(self, invoices: List[dict]) -> int:
         return sum(item['amount'] for item in invoices)
 
     # --- REASONING ENGINE ---
-    def process_request(self, input_data: FinanceInput) -> FinanceResponse:
+    def process_request(self, input_data: FinanceInput, doctor_id=None) -> FinanceResponse:
+        # doctor_id scopes every memory read to one doctor's invoices (database-backed memory only)
         query = input_data.user_query.lower()
+        scope = {"doctor_id": doctor_id} if doctor_id else {}
         
         # Security Check
         if input_data.role != "doctor":
@@ -86,30 +196,31 @@ class RevenueAgent:
             # Filter logic (GraphRAG can filter by procedure too)
             target_proc = "root canal" if "root canal" in query else None
             
-            # 1. Fetch Paid Invoices
-            paid_invoices = self.memory.query_invoices(status="Paid", procedure=target_proc)
-            
-            # 2. Calculate
-            total = self._calculate_total(paid_invoices)
+            # 1 + 2. Read the running totals (no invoice scan)
+            total = self.memory.total("Paid", target_proc, **scope)
+            count = self.memory.count("Paid", target_proc, **scope)
             
             context = f" from {target_proc}s" if target_proc else ""
             return FinanceResponse(
                 response_text=f"💰 Total Revenue Collected{context}: **Rs. {total}**.",
                 action_taken="report_generated",
-                data={"total": total, "count": len(paid_invoices)}
+                data={"total": total, "count": count}
             )
 
         # Intent B: Outstanding / Pending Bills
         if any(w in query for w in ["pending", "unpaid", "due", "owe", "outstanding"]):
             # 1. Fetch Pending
-            pending_invoices = self.memory.query_invoices(status="Pending")
+            pending_invoices = self.memory.query_invoices(status="Pending", limit=PENDING_LIST_LIMIT, **scope)
             
             # 2. Format Response
             if not pending_invoices:
                 return FinanceResponse(response_text="✅ No pending invoices. All clear.", action_taken="lookup")
             
-            total_pending = self._calculate_total(pending_invoices)
+            total_pending = self.memory.total("Pending", **scope)
             details = "\n".join([f"- {inv['patient_name']}: Rs. {inv['amount']} ({inv['procedure']})" for inv in pending_invoices])
+            remaining = self.memory.count("Pending", **scope) - len(pending_invoices)
+            if remaining > 0:
+                details += f"\n- ...and {remaining} more"
             
             return FinanceResponse(
                 response_text=f"⚠️ **Pending Invoices:**\n{details}\n\n**Total Outstanding:** Rs. {total_pending}",
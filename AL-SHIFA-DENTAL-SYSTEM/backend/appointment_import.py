@@ -0,0 +1,259 @@
+import argparse
+import csv
+import io
+import json
+import time
+import uuid
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+import dashboard_stats
+import models
+from slot_index import SlotError, normalize_time
+
+# --- BULK HISTORICAL APPOINTMENT IMPORT ---
+# Loads CSV / NDJSON visit history in chunks: references are resolved with one
+# query per chunk, rows are COPY'd into a temp staging table and moved into
+# `appointments` with ON CONFLICT DO NOTHING, so a bad row or a slot clash is
+# reported against its line instead of aborting the load.
+#
+# Each record needs `date` and `time` plus `patient_id` or `patient_email` and
+# `doctor_id` or `doctor_email`. Optional: `hospital_id` (defaults to the
+# doctor's), `status` (one of APPOINTMENT_STATUSES, any case; defaults to
+# "completed") and `notes`. Every reference is checked up front, because
+# ON CONFLICT DO NOTHING skips slot clashes but not foreign-key violations.
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+STAGE_COLUMNS = ("id", "patient_id", "doctor_id", "hospital_id", "date", "time", "status", "notes")
+
+class ImportReport:
+    def __init__(self):
+        self.total = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.doctor_ids = set() # doctors with imported rows, for the counter rebuild
+        self.started = time.perf_counter()
+
+    def error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "total": self.total,
+            "imported": self.imported,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_minute": int(self.imported / elapsed * 60) if elapsed else 0,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+def iter_records(stream, fmt: str) -> Iterator[Tuple[int, dict]]:
+    # Yields (line_number, record); line numbers count the CSV header as line 1
+    if fmt == "csv":
+        for index, row in enumerate(csv.DictReader(stream), start=2):
+            yield index, {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+    elif fmt == "ndjson":
+        for index, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record = {"_parse_error": str(e)}
+            yield index, record if isinstance(record, dict) else {"_parse_error": "expected a JSON object"}
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'")
+
+def _chunks(records: Iterable, size: int):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _as_uuid(value) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError):
+        return None
+
+class ReferenceResolver:
+    # Caches patient/doctor/hospital lookups across chunks; misses are fetched in one query per chunk
+    def __init__(self, conn):
+        self.conn = conn
+        self.patients: Dict[str, Optional[uuid.UUID]] = {}
+        self.doctors: Dict[str, Optional[Tuple[uuid.UUID, uuid.UUID]]] = {}
+        self.hospitals: Dict[str, bool] = {}
+
+    def _load(self, cache: dict, model, ids: set, emails: set, value):
+        missing_ids = {i for i in ids if str(i) not in cache}
+        missing_emails = {e for e in emails if e not in cache}
+        if missing_ids:
+            for row in self.conn.execute(select(model.id, *value).where(model.id.in_(missing_ids))):
+                cache[str(row[0])] = row[0] if not value else (row[0], row[1])
+            for i in missing_ids:
+                cache.setdefault(str(i), None)
+        if missing_emails:
+            stmt = select(models.User.email, model.id, *value).join(model, model.user_id == models.User.id).where(
+                models.User.email.in_(missing_emails)
+            )
+            for row in self.conn.execute(stmt):
+                cache[row[0]] = row[1] if not value else (row[1], row[2])
+            for e in missing_emails:
+                cache.setdefault(e, None)
+
+    @staticmethod
+    def _ref(r: dict, role: str):
+        # A record refers to a profile by `<role>_id` or by the user's `<role>_email`
+        ref_id = _as_uuid(r.get(f"{role}_id"))
+        return ref_id if ref_id else str(r.get(f"{role}_email") or "").strip()
+
+    def resolve(self, records):
+        refs = {"patient": (set(), set()), "doctor": (set(), set())}
+        hospital_ids = set()
+        for _, r in records:
+            for role, (ids, emails) in refs.items():
+                ref = self._ref(r, role)
+                if isinstance(ref, uuid.UUID):
+                    ids.add(ref)
+                elif ref:
+                    emails.add(ref)
+            hospital_id = _as_uuid(r.get("hospital_id"))
+            if hospital_id and str(hospital_id) not in self.hospitals:
+                hospital_ids.add(hospital_id)
+        self._load(self.patients, models.Patient, *refs["patient"], ())
+        self._load(self.doctors, models.Doctor, *refs["doctor"], (models.Doctor.hospital_id,))
+        if hospital_ids:
+            found = set(self.conn.execute(select(models.Hospital.id).where(models.Hospital.id.in_(hospital_ids))).scalars())
+            self.hospitals.update((str(h), h in found) for h in hospital_ids)
+
+    def patient(self, r) -> Optional[uuid.UUID]:
+        return self.patients.get(str(self._ref(r, "patient")))
+
+    def doctor(self, r):
+        return self.doctors.get(str(self._ref(r, "doctor")))
+
+    def hospital_exists(self, hospital_id: uuid.UUID) -> bool:
+        return self.hospitals.get(str(hospital_id), False)
+
+def _build_row(r: dict, resolver: ReferenceResolver) -> tuple:
+    # Returns the staged row or raises ValueError with a per-row message
+    if "_parse_error" in r:
+        raise ValueError(f"invalid JSON: {r['_parse_error']}")
+    patient_id = resolver.patient(r)
+    if patient_id is None:
+        raise ValueError("unknown patient")
+    doctor = resolver.doctor(r)
+    if doctor is None:
+        raise ValueError("unknown doctor")
+    try:
+        visit_date = date.fromisoformat(str(r.get("date") or ""))
+    except ValueError:
+        raise ValueError(f"invalid date '{r.get('date')}'")
+    raw_time = str(r.get("time") or "").strip()
+    if not raw_time:
+        raise ValueError("missing time")
+    try:
+        # Historical visits may sit off the current slot grid; they're still stored as "HH:MM"
+        visit_time = normalize_time(raw_time)
+    except SlotError:
+        raise ValueError(f"invalid time '{raw_time}'")
+    hospital_id = doctor[1]
+    if r.get("hospital_id"):
+        hospital_id = _as_uuid(r["hospital_id"])
+        if hospital_id is None or not resolver.hospital_exists(hospital_id):
+            raise ValueError(f"unknown hospital '{r['hospital_id']}'")
+    status = str(r.get("status") or "completed").strip().lower()
+    if status not in dashboard_stats.APPOINTMENT_STATUSES:
+        raise ValueError(f"invalid status '{r.get('status')}'")
+    return (uuid.uuid4(), patient_id, doctor[0], hospital_id, visit_date, visit_time,
+            status, r.get("notes") or None)
+
+def _copy_rows(dbapi_conn, rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    with dbapi_conn.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY appointment_import_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+
+def import_appointments(engine, records: Iterable[Tuple[int, dict]], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        progress: Optional[Callable[[dict], None]] = None, refresh_stats: bool = True) -> dict:
+    # refresh_stats: rebuild the dashboard counters of the doctors that received rows
+    report = ImportReport()
+    with engine.connect() as conn:
+        # Staging lives on this one connection; rows vanish at each chunk's commit
+        conn.execute(text(
+            "CREATE TEMP TABLE IF NOT EXISTS appointment_import_stage "
+            "(LIKE appointments INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        ))
+        conn.commit()
+        resolver = ReferenceResolver(conn)
+
+        for chunk in _chunks(records, chunk_size):
+            report.total += len(chunk)
+            resolver.resolve(chunk)
+            rows, line_by_id = [], {}
+            for line, record in chunk:
+                try:
+                    row = _build_row(record, resolver)
+                except ValueError as e:
+                    report.error(line, str(e))
+                    continue
+                rows.append(row)
+                line_by_id[row[0]] = line
+
+            if rows:
+                _copy_rows(conn.connection.dbapi_connection, rows)
+                inserted = set(conn.execute(text(
+                    f"INSERT INTO appointments ({', '.join(STAGE_COLUMNS)}) "
+                    f"SELECT {', '.join(STAGE_COLUMNS)} FROM appointment_import_stage "
+                    "ON CONFLICT DO NOTHING RETURNING id"
+                )).scalars())
+                conn.commit()
+                report.imported += len(inserted)
+                report.doctor_ids.update(row[2] for row in rows if row[0] in inserted)
+                for row_id, line in line_by_id.items():
+                    if row_id not in inserted:
+                        report.error(line, "doctor already has an active appointment in this slot")
+
+            if progress:
+                progress(report.as_dict())
+
+    if refresh_stats and report.doctor_ids:
+        with Session(engine) as db:
+            dashboard_stats.rebuild(db, report.doctor_ids)
+    report.errors.sort(key=lambda e: e["line"])
+    return report.as_dict()
+
+if __name__ == "__main__":
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Bulk import historical appointments")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="defaults to the file extension")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--skip-stats", action="store_true", help="don't rebuild the imported doctors' dashboard counters")
+    args = parser.parse_args()
+
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    with open(args.path, newline="", encoding="utf-8") as f:
+        result = import_appointments(
+            engine, iter_records(f, fmt), args.chunk_size,
+            progress=lambda r: print(f"  {r['total']} read, {r['imported']} imported, {r['failed']} failed ({r['rows_per_minute']} rows/min)"),
+            refresh_stats=not args.skip_stats
+        )
+    for err in result["errors"]:
+        print(f"❌ line {err['line']}: {err['error']}")
+    print(f"✅ Imported {result['imported']} of {result['total']} appointments in {result['elapsed_seconds']}s.")
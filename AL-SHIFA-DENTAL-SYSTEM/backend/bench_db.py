@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+import models
+
+# Compares the sync (threadpool) and async database paths under concurrent load,
+# using the doctor schedule query shape. Works against Postgres or an SQLite file:
+#   python bench_db.py --url sqlite:///bench.db --async-url sqlite+aiosqlite:///bench.db
+#   python bench_db.py --url postgresql://... --async-url postgresql+asyncpg://...
+
+def schedule_stmt(doctor_id):
+    return select(
+        models.Appointment.id, models.Appointment.date, models.Appointment.time,
+        models.Appointment.status, models.Patient.full_name
+    ).outerjoin(models.Appointment.patient).where(
+        models.Appointment.doctor_id == doctor_id, models.Appointment.date >= date.today()
+    ).order_by(models.Appointment.date, models.Appointment.time, models.Appointment.id).limit(100)
+
+def seed(engine, appointments: int):
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        hospital = models.Hospital(id=uuid.uuid4(), name="Bench Clinic", location="City Center")
+        doctor = models.Doctor(id=uuid.uuid4(), hospital_id=hospital.id, full_name="Dr. Bench", specialization="General Dentist")
+        patients = [models.Patient(id=uuid.uuid4(), full_name=f"Patient {i}") for i in range(100)]
+        db.add_all([hospital, doctor, *patients])
+        db.add_all([
+            models.Appointment(
+                patient_id=patients[i % len(patients)].id, doctor_id=doctor.id, hospital_id=hospital.id,
+                # Eight slots a day, then the next day: (doctor, date, time) stays unique
+                date=date.today() + timedelta(days=i // 8), time=f"{9 + i % 8:02d}:00", status="confirmed"
+            )
+            for i in range(appointments)
+        ])
+        db.commit()
+        return doctor.id
+
+def bench_sync(engine, doctor_id, concurrency: int, requests: int) -> float:
+    Session = sessionmaker(bind=engine)
+
+    def one_request(_):
+        with Session() as db:
+            db.execute(schedule_stmt(doctor_id)).all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_request, range(requests)))
+    return requests / (time.perf_counter() - start)
+
+async def bench_async(async_engine, doctor_id, concurrency: int, requests: int) -> float:
+    Session = async_sessionmaker(async_engine, expire_on_commit=False)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_request():
+        async with semaphore, Session() as db:
+            (await db.execute(schedule_stmt(doctor_id))).all()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+def main(args):
+    engine = create_engine(args.url)
+    async_engine = create_async_engine(args.async_url)
+    doctor_id = seed(engine, args.appointments)
+    print(f"{args.appointments} appointments seeded, {args.requests} requests per level")
+    for concurrency in args.concurrency:
+        sync_rate = bench_sync(engine, doctor_id, concurrency, args.requests)
+        async_rate = asyncio.run(bench_async(async_engine, doctor_id, concurrency, args.requests))
+        print(f"  concurrency={concurrency:<4} sync req/s={sync_rate:8.1f} async req/s={async_rate:8.1f}")
+    engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync vs async DB path benchmark")
+    parser.add_argument("--url", default="sqlite:///bench.db")
+    parser.add_argument("--async-url", default="sqlite+aiosqlite:///bench.db")
+    parser.add_argument("--appointments", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    main(parser.parse_args())
@@ -0,0 +1,46 @@
+import argparse
+import asyncio
+import os
+import time
+from password_hasher import PasswordHasher, PasswordHasherBusy, build_crypt_context
+
+# Reports verified logins/second through PasswordHasher at several concurrency
+# levels. No database needed: it measures the bcrypt path that /login uses.
+
+async def run_level(hasher: PasswordHasher, stored_hash: str, concurrency: int, total: int):
+    ok = rejected = 0
+    remaining = total
+
+    async def worker():
+        nonlocal ok, rejected, remaining
+        while remaining > 0:
+            remaining -= 1
+            try:
+                valid, _ = await hasher.verify_and_update("correct horse", stored_hash)
+                ok += int(valid)
+            except PasswordHasherBusy:
+                rejected += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return ok / elapsed, rejected
+
+async def main(args):
+    context = build_crypt_context(args.rounds)
+    hasher = PasswordHasher(context, workers=args.workers, max_queue=args.max_queue)
+    stored_hash = context.hash("correct horse")
+    print(f"bcrypt rounds={args.rounds} workers={args.workers} max_queue={args.max_queue}")
+    for concurrency in args.concurrency:
+        rate, rejected = await run_level(hasher, stored_hash, concurrency, args.logins)
+        print(f"  concurrency={concurrency:<4} logins/s={rate:8.1f} rejected={rejected}")
+    hasher.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login throughput benchmark")
+    parser.add_argument("--rounds", type=int, default=int(os.getenv("BCRYPT_ROUNDS", "12")))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    asyncio.run(main(parser.parse_args()))
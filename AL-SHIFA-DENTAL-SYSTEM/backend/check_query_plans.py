@@ -0,0 +1,48 @@
+import json
+import sys
+from sqlalchemy import text
+from database import engine
+
+# Hot queries from main.py. Each must be answerable from an index; with
+# enable_seqscan off, a "Seq Scan" in the plan means no usable index exists.
+# Ids are constant literals: a volatile expression such as gen_random_uuid()
+# can't be matched against an index, so it would always plan a Seq Scan.
+ANY_ID = "'00000000-0000-0000-0000-000000000000'::uuid"
+
+HOT_QUERIES = {
+    "doctor day view": f"SELECT * FROM appointments WHERE doctor_id = {ANY_ID} AND date = CURRENT_DATE",
+    "doctor schedule keyset": (
+        f"SELECT id FROM appointments WHERE doctor_id = {ANY_ID} AND date >= CURRENT_DATE "
+        "ORDER BY date, time, id LIMIT 100"
+    ),
+    "patient history": f"SELECT * FROM appointments WHERE patient_id = {ANY_ID}",
+    "doctor by user": f"SELECT * FROM doctors WHERE user_id = {ANY_ID}",
+    "patient by user": f"SELECT * FROM patients WHERE user_id = {ANY_ID}",
+    "user by email": "SELECT * FROM users WHERE email = 'x@example.com'",
+}
+
+def find_seq_scans(plan: dict) -> list:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child))
+    return found
+
+def check_plans() -> bool:
+    ok = True
+    with engine.connect() as connection:
+        connection.execute(text("SET enable_seqscan = off"))
+        for name, sql in HOT_QUERIES.items():
+            raw = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            seq_scans = find_seq_scans(plan)
+            if seq_scans:
+                ok = False
+                print(f"❌ {name}: sequential scan on {', '.join(seq_scans)}")
+            else:
+                print(f"✅ {name}")
+    return ok
+
+if __name__ == "__main__":
+    sys.exit(0 if check_plans() else 1)
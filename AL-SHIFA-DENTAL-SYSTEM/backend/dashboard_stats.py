@@ -0,0 +1,176 @@
+import argparse
+import sys
+from typing import Iterable, Optional
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import models
+
+# --- INCREMENTAL DASHBOARD COUNTERS ---
+# Per-doctor/per-day rows updated inside the same transaction as the appointment
+# write, so GET /doctor/dashboard reads two primary-key rows instead of scanning.
+# `python dashboard_stats.py rebuild` recomputes everything; `check` reports drift.
+# Bulk loads rebuild only the doctors they touched (`rebuild(db, doctor_ids)`).
+
+APPOINTMENT_FEE = 1500
+APPOINTMENT_STATUSES = ("scheduled", "confirmed", "completed", "cancelled")
+INACTIVE_STATUSES = ("cancelled",)
+
+def is_billable(status: str) -> bool:
+    return status not in INACTIVE_STATUSES
+
+async def _has_other_active_visit(db: AsyncSession, appt: models.Appointment) -> bool:
+    # Same doctor, patient and day, excluding this appointment (served by ix_appointments_doctor_date_time)
+    result = await db.execute(
+        select(models.Appointment.id).where(
+            models.Appointment.doctor_id == appt.doctor_id,
+            models.Appointment.date == appt.date,
+            models.Appointment.patient_id == appt.patient_id,
+            models.Appointment.id != appt.id,
+            models.Appointment.status.notin_(INACTIVE_STATUSES)
+        ).limit(1)
+    )
+    return result.first() is not None
+
+async def _bump_day(db: AsyncSession, doctor_id, day, appointments: int, patients: int, revenue: int):
+    stmt = pg_insert(models.DoctorDailyStats).values(
+        doctor_id=doctor_id,
+        day=day,
+        appointment_count=appointments,
+        patient_count=patients,
+        billed_revenue=revenue
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.DoctorDailyStats.doctor_id, models.DoctorDailyStats.day],
+        set_={
+            "appointment_count": models.DoctorDailyStats.appointment_count + stmt.excluded.appointment_count,
+            "patient_count": models.DoctorDailyStats.patient_count + stmt.excluded.patient_count,
+            "billed_revenue": models.DoctorDailyStats.billed_revenue + stmt.excluded.billed_revenue
+        }
+    )
+    await db.execute(stmt)
+
+def _delta(appointments: int = 0, patients: int = 0, revenue: int = 0, total_patients: int = 0) -> dict:
+    return {"appointments": appointments, "patients": patients, "revenue": revenue, "total_patients": total_patients}
+
+async def record_appointment_created(db: AsyncSession, appt: models.Appointment) -> dict:
+    # Call after the appointment is flushed and before commit; returns the counter deltas applied
+    delta = _delta()
+    if is_billable(appt.status):
+        first_visit_today = not await _has_other_active_visit(db, appt)
+        delta.update(appointments=1, patients=int(first_visit_today), revenue=APPOINTMENT_FEE)
+        await _bump_day(db, appt.doctor_id, appt.date, delta["appointments"], delta["patients"], delta["revenue"])
+
+    linked = await db.execute(
+        pg_insert(models.DoctorPatient).values(doctor_id=appt.doctor_id, patient_id=appt.patient_id)
+        .on_conflict_do_nothing().returning(models.DoctorPatient.patient_id)
+    )
+    if linked.first() is not None:
+        stmt = pg_insert(models.DoctorStats).values(doctor_id=appt.doctor_id, total_patients=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.DoctorStats.doctor_id],
+            set_={"total_patients": models.DoctorStats.total_patients + 1}
+        )
+        await db.execute(stmt)
+        delta["total_patients"] = 1
+    return delta
+
+async def record_status_change(db: AsyncSession, appt: models.Appointment, old_status: str) -> dict:
+    # Call after appt.status is updated and before commit; returns the counter deltas applied
+    was_billable, now_billable = is_billable(old_status), is_billable(appt.status)
+    if was_billable == now_billable:
+        return _delta()
+    sign = 1 if now_billable else -1
+    other_visit = await _has_other_active_visit(db, appt)
+    delta = _delta(appointments=sign, patients=0 if other_visit else sign, revenue=sign * APPOINTMENT_FEE)
+    await _bump_day(db, appt.doctor_id, appt.date, delta["appointments"], delta["patients"], delta["revenue"])
+    return delta
+
+async def read_dashboard_counters(db: AsyncSession, doctor_id, day) -> dict:
+    daily = await db.get(models.DoctorDailyStats, (doctor_id, day))
+    totals = await db.get(models.DoctorStats, doctor_id)
+    return {
+        "today_count": daily.appointment_count if daily else 0,
+        "today_patients": daily.patient_count if daily else 0,
+        "revenue": daily.billed_revenue if daily else 0,
+        "total_patients": totals.total_patients if totals else 0
+    }
+
+# --- REBUILD / DRIFT CHECK ---
+def _daily_source(doctor_ids: Optional[list] = None):
+    stmt = select(
+        models.Appointment.doctor_id,
+        models.Appointment.date,
+        func.count(models.Appointment.id),
+        func.count(models.Appointment.patient_id.distinct()),
+        func.count(models.Appointment.id) * APPOINTMENT_FEE
+    ).where(
+        models.Appointment.doctor_id.isnot(None),
+        models.Appointment.status.notin_(INACTIVE_STATUSES)
+    ).group_by(models.Appointment.doctor_id, models.Appointment.date)
+    return stmt.where(models.Appointment.doctor_id.in_(doctor_ids)) if doctor_ids is not None else stmt
+
+def _pairs_source(doctor_ids: Optional[list] = None):
+    stmt = select(models.Appointment.doctor_id, models.Appointment.patient_id).where(
+        models.Appointment.doctor_id.isnot(None),
+        models.Appointment.patient_id.isnot(None)
+    ).distinct()
+    return stmt.where(models.Appointment.doctor_id.in_(doctor_ids)) if doctor_ids is not None else stmt
+
+def _totals_source(doctor_ids: Optional[list] = None):
+    pairs = _pairs_source(doctor_ids).subquery()
+    return select(pairs.c.doctor_id, func.count()).group_by(pairs.c.doctor_id)
+
+def rebuild(db: Session, doctor_ids: Optional[Iterable] = None):
+    # Everything, or only the given doctors' rows (other doctors' counters are left alone)
+    doctor_ids = list(doctor_ids) if doctor_ids is not None else None
+    if doctor_ids == []:
+        return
+    for model in (models.DoctorDailyStats, models.DoctorPatient, models.DoctorStats):
+        stmt = delete(model)
+        db.execute(stmt.where(model.doctor_id.in_(doctor_ids)) if doctor_ids is not None else stmt)
+    db.execute(insert(models.DoctorDailyStats).from_select(
+        ["doctor_id", "day", "appointment_count", "patient_count", "billed_revenue"], _daily_source(doctor_ids)
+    ))
+    db.execute(insert(models.DoctorPatient).from_select(["doctor_id", "patient_id"], _pairs_source(doctor_ids)))
+    db.execute(insert(models.DoctorStats).from_select(["doctor_id", "total_patients"], _totals_source(doctor_ids)))
+    db.commit()
+
+def check_drift(db: Session) -> list:
+    drift = []
+    expected_daily = {(r[0], r[1]): tuple(r[2:]) for r in db.execute(_daily_source())}
+    stored_daily = {
+        (r.doctor_id, r.day): (r.appointment_count, r.patient_count, r.billed_revenue)
+        for r in db.query(models.DoctorDailyStats)
+    }
+    for key in expected_daily.keys() | stored_daily.keys():
+        expected, stored = expected_daily.get(key, (0, 0, 0)), stored_daily.get(key, (0, 0, 0))
+        if expected != stored:
+            drift.append(f"doctor {key[0]} on {key[1]}: expected {expected}, stored {stored}")
+
+    expected_totals = dict(db.execute(_totals_source()).all())
+    stored_totals = {r.doctor_id: r.total_patients for r in db.query(models.DoctorStats)}
+    for doctor_id in expected_totals.keys() | stored_totals.keys():
+        if expected_totals.get(doctor_id, 0) != stored_totals.get(doctor_id, 0):
+            drift.append(f"doctor {doctor_id} total patients: expected {expected_totals.get(doctor_id, 0)}, stored {stored_totals.get(doctor_id, 0)}")
+    return drift
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Doctor dashboard counters")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if args.command == "rebuild":
+            rebuild(db)
+            print("✅ Dashboard counters rebuilt from appointments.")
+        else:
+            problems = check_drift(db)
+            for line in problems:
+                print(f"❌ {line}")
+            if not problems:
+                print("✅ Dashboard counters match appointments.")
+            sys.exit(1 if problems else 0)
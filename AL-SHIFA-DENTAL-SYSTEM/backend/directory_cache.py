@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+import models
+
+# --- DOCTOR / HOSPITAL DIRECTORY SNAPSHOT ---
+# GET /doctors is served from a prebuilt JSON body keyed on the "doctor_directory"
+# CacheVersion row. Writes that touch Doctor or Hospital rows bump that row in the
+# same transaction; every worker re-reads it at most every `check_interval`
+# seconds and rebuilds with one join when it moved, so no worker validates a
+# stale ETag for longer than that.
+DIRECTORY_CACHE = "doctor_directory"
+
+def bump_directory_version(db: Session):
+    # Row is seeded by migration 0009. Plain UPDATE so it also runs inside flush events.
+    db.execute(
+        update(models.CacheVersion)
+        .where(models.CacheVersion.name == DIRECTORY_CACHE)
+        .values(version=models.CacheVersion.version + 1)
+    )
+
+class DirectorySnapshot:
+    def __init__(self, body: bytes, etag: str, last_modified: datetime, version: int):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def headers(self) -> dict:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+            "Cache-Control": "no-cache"
+        }
+
+    def matches(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        # If-None-Match wins over If-Modified-Since (RFC 9110 13.1.3)
+        if if_none_match is not None:
+            tags = [t.strip() for t in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags
+        if if_modified_since is not None:
+            try:
+                return self.last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+class DoctorDirectory:
+    def __init__(self, check_interval: float = 2.0):
+        self.check_interval = check_interval
+        self.version = 0
+        self.rebuilds = 0
+        self._checked_at = 0.0
+        self._snapshot: Optional[DirectorySnapshot] = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        # Local commits force a version check on the next request
+        self._checked_at = 0.0
+
+    def current(self) -> Optional[DirectorySnapshot]:
+        snap = self._snapshot
+        if snap is None or time.monotonic() - self._checked_at > self.check_interval:
+            return None
+        return snap
+
+    async def get(self, db) -> DirectorySnapshot:
+        snap = self.current()
+        if snap is not None:
+            return snap
+        async with self._lock:
+            snap = self.current()
+            if snap is not None:
+                return snap
+            checked_at = time.monotonic()
+            self.version = (await db.execute(
+                select(models.CacheVersion.version).where(models.CacheVersion.name == DIRECTORY_CACHE)
+            )).scalar_one_or_none() or 0
+            snap = self._snapshot
+            if snap is None or snap.version != self.version:
+                snap = await self._rebuild(db, self.version)
+                self._snapshot = snap
+            self._checked_at = checked_at
+            return snap
+
+    async def _rebuild(self, db, version: int) -> DirectorySnapshot:
+        rows = (await db.execute(
+            select(
+                models.Doctor.id,
+                models.Doctor.full_name,
+                models.Doctor.specialization,
+                models.Hospital.name,
+                models.Hospital.location
+            ).outerjoin(models.Doctor.hospital).order_by(models.Doctor.full_name, models.Doctor.id)
+        )).all()
+        body = json.dumps([
+            {
+                "id": str(r.id),
+                "full_name": r.full_name,
+                "specialization": r.specialization,
+                "hospital_name": r.name or "Unknown Clinic",
+                "location": r.location or "City Center"
+            }
+            for r in rows
+        ]).encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        previous = self._snapshot
+        # Unchanged content keeps its Last-Modified so If-Modified-Since stays valid
+        if previous is not None and previous.etag == etag:
+            last_modified = previous.last_modified
+        else:
+            last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self.rebuilds += 1
+        return DirectorySnapshot(body, etag, last_modified, version)
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            "version": self.version,
+            "rebuilds": self.rebuilds,
+            "etag": snap.etag if snap else None,
+            "fresh": self.current() is not None
+        }
+
+doctor_directory = DoctorDirectory()
+
+# The bump rides in the writing transaction, so readers only see the new version
+# together with the data; the local recheck waits for the commit.
+@event.listens_for(Session, "after_flush")
+def _bump_directory(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (models.Doctor, models.Hospital)):
+            bump_directory_version(session)
+            session.info["directory_dirty"] = True
+            return
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_directory(session):
+    if session.info.pop("directory_dirty", False):
+        doctor_directory.invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _clear_directory_flag(session):
+    session.info.pop("directory_dirty", None)
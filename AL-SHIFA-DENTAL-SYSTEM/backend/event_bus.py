@@ -0,0 +1,113 @@
+import asyncio
+import json
+import logging
+from typing import Dict, Set
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# --- PER-DOCTOR SERVER PUSH ---
+# Write paths publish with pg_notify inside their own transaction, so an event is
+# delivered only if (and when) the write commits. Every worker process LISTENs on
+# one connection and fans notifications out to the SSE subscribers of that doctor.
+
+CHANNEL = "doctor_events"
+SUBSCRIBER_QUEUE_SIZE = 100
+RESYNC = {"type": "resync"}
+
+class DoctorEventBus:
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._task = None
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    # --- PUBLISH (inside the write transaction) ---
+    async def publish(self, db: AsyncSession, doctor_id, event: dict):
+        payload = json.dumps({"doctor_id": str(doctor_id), **event}, default=str)
+        await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+        self.published += 1
+
+    # --- SUBSCRIBE (one queue per open SSE stream) ---
+    def subscribe(self, doctor_id) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(str(doctor_id), set()).add(queue)
+        return queue
+
+    def unsubscribe(self, doctor_id, queue: asyncio.Queue):
+        queues = self._subscribers.get(str(doctor_id))
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[str(doctor_id)]
+
+    def _offer(self, queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+            self.delivered += 1
+        except asyncio.QueueFull:
+            # Slow client: replace its backlog with a single resync request
+            self.dropped += queue.qsize()
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        for queue in list(self._subscribers.get(event.pop("doctor_id", ""), ())):
+            self._offer(queue, event)
+
+    def _resync_all(self):
+        for queues in self._subscribers.values():
+            for queue in list(queues):
+                self._offer(queue, RESYNC)
+
+    # --- LISTENER LIFECYCLE ---
+    async def _listen_forever(self):
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                await conn.add_listener(CHANNEL, self._on_notify)
+                # Anything published while we were disconnected is lost: clients refetch
+                self._resync_all()
+                while not conn.is_closed():
+                    await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning("doctor event listener disconnected: %s", e)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(2)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._listen_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "listening": self._task is not None and not self._task.done(),
+            "doctors": len(self._subscribers),
+            "subscribers": sum(len(q) for q in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped
+        }
@@ -0,0 +1,274 @@
+import argparse
+import sys
+import uuid
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import delete, func, insert, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+import models
+from agents.revenue_agent import FinancialGraph
+
+# --- PERSISTENT INVOICES + REVENUE ROLLUPS ---
+# Invoices live in a table range-partitioned by month (issued_on). Every
+# invoice write also adjusts one revenue_daily_rollups row per
+# (doctor, day, procedure, status) in the same transaction, so totals are sums
+# over a few rollup rows and never touch the invoices themselves.
+# `python finance_store.py rebuild|check` recomputes / verifies the rollups and
+# `python finance_store.py partitions` creates the coming months' partitions.
+
+INVOICE_STATUSES = ("Pending", "Paid", "Cancelled")
+
+def normalize_status(status: str) -> str:
+    for known in INVOICE_STATUSES:
+        if known.lower() == status.lower():
+            return known
+    raise ValueError(f"Unknown invoice status: {status}")
+
+def _bump_rollup(db: Session, inv: models.Invoice, status: str, sign: int):
+    stmt = pg_insert(models.RevenueDailyRollup).values(
+        doctor_id=inv.doctor_id,
+        day=inv.issued_on,
+        procedure=inv.procedure,
+        status=status,
+        amount=sign * inv.amount,
+        invoice_count=sign
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            models.RevenueDailyRollup.doctor_id, models.RevenueDailyRollup.day,
+            models.RevenueDailyRollup.procedure, models.RevenueDailyRollup.status
+        ],
+        set_={
+            "amount": models.RevenueDailyRollup.amount + stmt.excluded.amount,
+            "invoice_count": models.RevenueDailyRollup.invoice_count + stmt.excluded.invoice_count
+        }
+    )
+    db.execute(stmt)
+
+def invoice_node(inv: models.Invoice, patient_name: Optional[str]) -> dict:
+    # Same shape as the in-memory FinancialGraph nodes
+    return {
+        "id": str(inv.id),
+        "patient_id": str(inv.patient_id),
+        "patient_name": patient_name,
+        "procedure": inv.procedure,
+        "amount": inv.amount,
+        "status": inv.status,
+        "date": inv.issued_on.isoformat(),
+        "appointment_id": str(inv.appointment_id) if inv.appointment_id else None
+    }
+
+def _month_start(day: date, offset: int = 0) -> date:
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+def ensure_partitions(db: Session, months_ahead: int = 12, start: Optional[date] = None) -> List[str]:
+    # Creates missing monthly partitions; run before rows for those months land in DEFAULT
+    start = _month_start(start or date.today())
+    created = []
+    for i in range(months_ahead + 1):
+        lo, hi = _month_start(start, i), _month_start(start, i + 1)
+        name = f"invoices_y{lo.year}m{lo.month:02d}"
+        exists = db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if exists is None:
+            db.execute(text(f"CREATE TABLE {name} PARTITION OF invoices FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"))
+            created.append(name)
+    db.commit()
+    return created
+
+class DatabaseFinancialGraph(FinancialGraph):
+    # Same read API as FinancialGraph, plus an optional doctor_id scope; totals come from the rollups
+    def __init__(self, session_factory):
+        # No super().__init__(): the demo invoices are replaced by the tables
+        self.session_factory = session_factory
+
+    # --- READS ---
+    @staticmethod
+    def _rollup_filters(doctor_id=None, status: Optional[str] = None, procedure: Optional[str] = None,
+                        date_from: Optional[date] = None, date_to: Optional[date] = None) -> list:
+        r = models.RevenueDailyRollup
+        filters = []
+        if doctor_id:
+            filters.append(r.doctor_id == doctor_id)
+        if status:
+            filters.append(r.status == normalize_status(status))
+        if procedure:
+            filters.append(r.procedure.ilike(f"%{procedure}%"))
+        if date_from:
+            filters.append(r.day >= date_from)
+        if date_to:
+            filters.append(r.day <= date_to)
+        return filters
+
+    def totals(self, doctor_id=None, procedure: Optional[str] = None,
+               date_from: Optional[date] = None, date_to: Optional[date] = None) -> Dict[str, dict]:
+        # {status: {"amount", "count"}} for every status, in one grouped rollup read
+        r = models.RevenueDailyRollup
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(r.status, func.sum(r.amount), func.sum(r.invoice_count))
+                .where(*self._rollup_filters(doctor_id, None, procedure, date_from, date_to))
+                .group_by(r.status)
+            ).all()
+        result = {s: {"amount": 0, "count": 0} for s in INVOICE_STATUSES}
+        for status, amount, count in rows:
+            result[status] = {"amount": int(amount or 0), "count": int(count or 0)}
+        return result
+
+    def total(self, status: str, procedure: Optional[str] = None, doctor_id=None) -> int:
+        return self.totals(doctor_id, procedure)[normalize_status(status)]["amount"]
+
+    def count(self, status: str, procedure: Optional[str] = None, doctor_id=None) -> int:
+        return self.totals(doctor_id, procedure)[normalize_status(status)]["count"]
+
+    @property
+    def paid_total(self) -> int:
+        return self.total("Paid")
+
+    @property
+    def pending_total(self) -> int:
+        return self.total("Pending")
+
+    def _invoice_query(self, doctor_id=None, status: Optional[str] = None, procedure: Optional[str] = None):
+        inv = models.Invoice
+        stmt = select(inv, models.Patient.full_name).join(models.Patient, models.Patient.id == inv.patient_id)
+        if doctor_id:
+            stmt = stmt.where(inv.doctor_id == doctor_id)
+        if status:
+            stmt = stmt.where(inv.status == normalize_status(status))
+        if procedure:
+            stmt = stmt.where(inv.procedure.ilike(f"%{procedure}%"))
+        return stmt
+
+    def query_invoices(self, status: Optional[str] = None, procedure: Optional[str] = None,
+                       patient_id: Optional[str] = None, month: Optional[str] = None,
+                       limit: Optional[int] = None, doctor_id=None) -> List[dict]:
+        inv = models.Invoice
+        stmt = self._invoice_query(doctor_id, status, procedure)
+        if patient_id:
+            stmt = stmt.where(inv.patient_id == uuid.UUID(str(patient_id)))
+        if month:
+            # Bounds on the partition key let the planner prune to one partition
+            start = date.fromisoformat(f"{month}-01")
+            stmt = stmt.where(inv.issued_on >= start, inv.issued_on < _month_start(start, 1))
+        stmt = stmt.order_by(inv.issued_on.desc(), inv.id.desc())
+        if limit:
+            stmt = stmt.limit(limit)
+        with self.session_factory() as db:
+            return [invoice_node(row, name) for row, name in db.execute(stmt).all()]
+
+    def page_invoices(self, limit: int, after: Optional[tuple] = None, date_from: Optional[str] = None,
+                      date_to: Optional[str] = None, status: Optional[str] = None,
+                      procedure: Optional[str] = None, doctor_id=None) -> List[dict]:
+        # Newest-first keyset over (issued_on, id), served by ix_invoices_doctor_issued
+        inv = models.Invoice
+        stmt = self._invoice_query(doctor_id, status, procedure)
+        if after:
+            stmt = stmt.where(tuple_(inv.issued_on, inv.id) < tuple_(date.fromisoformat(after[0]), uuid.UUID(after[1])))
+        if date_from:
+            stmt = stmt.where(inv.issued_on >= date.fromisoformat(date_from))
+        if date_to:
+            stmt = stmt.where(inv.issued_on <= date.fromisoformat(date_to))
+        stmt = stmt.order_by(inv.issued_on.desc(), inv.id.desc()).limit(limit)
+        with self.session_factory() as db:
+            return [invoice_node(row, name) for row, name in db.execute(stmt).all()]
+
+    # --- WRITES (invoice row + rollup in one transaction) ---
+    def create_invoice(self, doctor_id, appointment_id, procedure: str, amount: int, status: str = "Pending") -> dict:
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        status = normalize_status(status)
+        with self.session_factory() as db:
+            appt = db.execute(
+                select(models.Appointment).where(models.Appointment.id == appointment_id, models.Appointment.doctor_id == doctor_id)
+            ).scalar_one_or_none()
+            if appt is None:
+                raise KeyError(appointment_id)
+            inv = models.Invoice(
+                id=uuid.uuid4(),
+                issued_on=appt.date,
+                doctor_id=doctor_id,
+                patient_id=appt.patient_id,
+                appointment_id=appt.id,
+                procedure=procedure,
+                amount=amount,
+                status=status
+            )
+            db.add(inv)
+            db.flush()
+            _bump_rollup(db, inv, status, 1)
+            patient_name = db.execute(select(models.Patient.full_name).where(models.Patient.id == appt.patient_id)).scalar()
+            node = invoice_node(inv, patient_name)
+            db.commit()
+            return node
+
+    def set_status(self, inv_id: str, status: str, doctor_id=None) -> dict:
+        status = normalize_status(status)
+        with self.session_factory() as db:
+            stmt = select(models.Invoice).where(models.Invoice.id == uuid.UUID(str(inv_id))).with_for_update()
+            if doctor_id:
+                stmt = stmt.where(models.Invoice.doctor_id == doctor_id)
+            inv = db.execute(stmt).scalar_one_or_none()
+            if inv is None:
+                raise KeyError(inv_id)
+            if inv.status != status:
+                _bump_rollup(db, inv, inv.status, -1)
+                _bump_rollup(db, inv, status, 1)
+                inv.status = status
+            patient_name = db.execute(select(models.Patient.full_name).where(models.Patient.id == inv.patient_id)).scalar()
+            node = invoice_node(inv, patient_name)
+            db.commit()
+            return node
+
+# --- ROLLUP MAINTENANCE ---
+def _rollup_source():
+    inv = models.Invoice
+    return select(
+        inv.doctor_id, inv.issued_on, inv.procedure, inv.status,
+        func.sum(inv.amount), func.count()
+    ).group_by(inv.doctor_id, inv.issued_on, inv.procedure, inv.status)
+
+def rebuild(db: Session):
+    db.execute(delete(models.RevenueDailyRollup))
+    db.execute(insert(models.RevenueDailyRollup).from_select(
+        ["doctor_id", "day", "procedure", "status", "amount", "invoice_count"], _rollup_source()
+    ))
+    db.commit()
+
+def check_drift(db: Session) -> list:
+    r = models.RevenueDailyRollup
+    expected = {tuple(row[:4]): (int(row[4]), int(row[5])) for row in db.execute(_rollup_source())}
+    stored = {
+        (row.doctor_id, row.day, row.procedure, row.status): (row.amount, row.invoice_count)
+        for row in db.execute(select(r)).scalars()
+    }
+    drift = []
+    for key in expected.keys() | stored.keys():
+        want, have = expected.get(key, (0, 0)), stored.get(key, (0, 0))
+        if want != have:
+            drift.append(f"doctor {key[0]} {key[1]} {key[2]}/{key[3]}: expected {want}, stored {have}")
+    return drift
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Invoice rollups and partitions")
+    parser.add_argument("command", choices=["rebuild", "check", "partitions"])
+    parser.add_argument("--months-ahead", type=int, default=12)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if args.command == "rebuild":
+            rebuild(db)
+            print("✅ Revenue rollups rebuilt from invoices.")
+        elif args.command == "partitions":
+            created = ensure_partitions(db, args.months_ahead)
+            print(f"✅ Created {len(created)} partition(s): {', '.join(created) or 'none needed'}")
+        else:
+            problems = check_drift(db)
+            for line in problems:
+                print(f"❌ {line}")
+            if not problems:
+                print("✅ Revenue rollups match invoices.")
+            sys.exit(1 if problems else 0)
@@ -0,0 +1,272 @@
+import sys
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, joinedload, selectinload
+import models
+from agents.inventory_agent import ExpiryIndex, ItemNameIndex, SupplyChainGraph
+from inventory_forecast import ConsumptionForecaster
+
+# --- DATABASE-BACKED SUPPLY CHAIN GRAPH ---
+# Same node shape and query API as the in-memory SupplyChainGraph, but the
+# inventory / inventory_batches / suppliers tables are the source of truth.
+# Each process keeps the whole graph in memory and re-checks one version row at
+# most every `check_interval` seconds; writes bump that row in their own
+# transaction and are applied to the local copy straight away (write-through),
+# so every worker converges on the same stock. The name and expiry indexes are
+# rebuilt on a full reload and patched per item on a write (the name index only
+# when an item is added or renamed). Consumption is also logged per item per
+# day, and a full reload rebuilds the run-out forecaster from that log.
+
+INVENTORY_CACHE = "inventory"
+
+def stock_status(stock: int, threshold: int) -> str:
+    if stock < threshold:
+        return "Critical"
+    if stock < threshold * 1.5:
+        return "Low"
+    return "Good"
+
+def item_key(item: models.Inventory) -> str:
+    return item.sku or str(item.id)
+
+def item_node(item: models.Inventory) -> dict:
+    batches = sorted(item.batches, key=lambda b: (b.expiry, b.batch_code))
+    return {
+        "name": item.item_name,
+        "stock": item.quantity or 0,
+        "threshold": item.threshold,
+        "supplier": item.supplier.name if item.supplier else "Unknown",
+        "batches": [{"batch_id": b.batch_code, "expiry": b.expiry.isoformat(), "qty": b.quantity} for b in batches if b.quantity > 0],
+        "usage_rate": item.usage_rate
+    }
+
+def _current_version(db: Session) -> int:
+    return db.execute(
+        select(models.CacheVersion.version).where(models.CacheVersion.name == INVENTORY_CACHE)
+    ).scalar_one_or_none() or 0
+
+def _bump_version(db: Session) -> int:
+    stmt = pg_insert(models.CacheVersion).values(name=INVENTORY_CACHE, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.CacheVersion.name],
+        set_={"version": models.CacheVersion.version + 1}
+    ).returning(models.CacheVersion.version)
+    return db.execute(stmt).scalar_one()
+
+def _item_filter(key: str):
+    try:
+        return models.Inventory.id == uuid.UUID(key)
+    except ValueError:
+        return models.Inventory.sku == key
+
+class DatabaseSupplyChainGraph(SupplyChainGraph):
+    def __init__(self, session_factory, check_interval: float = 2.0):
+        # No super().__init__(): the demo graph is replaced by the tables
+        self.session_factory = session_factory
+        self.check_interval = check_interval
+        self._graph = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self.reloads = 0
+        self.forecaster = ConsumptionForecaster()
+        self._name_index = None
+        self._expiry_index = None
+
+    # --- READ PATH (memory, revalidated against the version row) ---
+    def _is_fresh(self) -> bool:
+        return self._version is not None and time.monotonic() - self._checked_at < self.check_interval
+
+    @property
+    def graph(self) -> dict:
+        if self._is_fresh():
+            return self._graph
+        with self._lock:
+            if not self._is_fresh():
+                with self.session_factory() as db:
+                    version = _current_version(db)
+                    if version != self._version:
+                        graph = self._load(db)
+                        self.forecaster.reset(graph, self._load_usage(db))
+                        self._replace(graph, version)
+                self._checked_at = time.monotonic()
+        return self._graph
+
+    def _load(self, db: Session) -> dict:
+        items = db.execute(
+            select(models.Inventory).options(joinedload(models.Inventory.supplier), selectinload(models.Inventory.batches))
+        ).scalars().all()
+        return {item_key(item): item_node(item) for item in items}
+
+    def _load_usage(self, db: Session) -> List[tuple]:
+        since = date.today() - timedelta(days=self.forecaster.window)
+        rows = db.execute(
+            select(models.Inventory.sku, models.Inventory.id, models.InventoryDailyUsage.day, models.InventoryDailyUsage.quantity)
+            .join(models.InventoryDailyUsage, models.InventoryDailyUsage.inventory_id == models.Inventory.id)
+            .where(models.InventoryDailyUsage.day > since)
+        ).all()
+        return [(sku or str(item_id), day, qty) for sku, item_id, day, qty in rows]
+
+    def _replace(self, graph: dict, version: int):
+        # Readers always see a complete dict; the indexes are rebuilt lazily from it
+        self._graph = graph
+        self._version = version
+        self._name_index = None
+        self._expiry_index = None
+        self.reloads += 1
+
+    def _apply(self, key: str, node: dict, version: int):
+        with self._lock:
+            if self._version == version - 1:
+                old = self._graph.get(key)
+                graph = dict(self._graph)
+                graph[key] = node
+                # Patch the indexes for this one item instead of rebuilding them
+                if self._expiry_index is not None:
+                    self._expiry_index.update_item(key, node)
+                if self._name_index is not None and (old is None or old["name"] != node["name"]):
+                    self._name_index.update_item(key, node["name"])
+                self.forecaster.update_item(key, node)
+                self._graph = graph
+                self._version = version
+            else:
+                # Another writer got in between: reload on next read
+                self._version = None
+
+    # --- DERIVED INDEXES ---
+    @property
+    def name_index(self) -> ItemNameIndex:
+        self.graph # revalidate first
+        index = self._name_index
+        if index is None:
+            with self._lock:
+                if self._name_index is None:
+                    self._name_index = ItemNameIndex({key: node["name"] for key, node in self._graph.items()})
+                index = self._name_index
+        return index
+
+    @property
+    def expiry_index(self) -> ExpiryIndex:
+        self.graph
+        index = self._expiry_index
+        if index is None:
+            with self._lock:
+                if self._expiry_index is None:
+                    self._expiry_index = ExpiryIndex(self._graph)
+                index = self._expiry_index
+        return index
+
+    # --- WRITE PATH (database first, then the local copy) ---
+    def _locked_item(self, db: Session, key: str) -> models.Inventory:
+        item = db.execute(
+            select(models.Inventory).options(joinedload(models.Inventory.supplier), selectinload(models.Inventory.batches))
+            .where(_item_filter(key)).with_for_update(of=models.Inventory)
+        ).scalar_one_or_none()
+        if item is None:
+            raise KeyError(key)
+        return item
+
+    def _finish_write(self, db: Session, item: models.Inventory) -> dict:
+        item.quantity = sum(b.quantity for b in item.batches)
+        item.status = stock_status(item.quantity, item.threshold)
+        version = _bump_version(db)
+        db.flush()
+        key, node = item_key(item), item_node(item)
+        db.commit()
+        self._apply(key, node, version)
+        return node
+
+    def add_batch(self, key: str, batch_code: str, expiry: date, qty: int) -> dict:
+        if qty <= 0:
+            raise ValueError("Quantity must be positive")
+        with self.session_factory() as db:
+            item = self._locked_item(db, key)
+            item.batches.append(models.InventoryBatch(batch_code=batch_code, expiry=expiry, quantity=qty))
+            return self._finish_write(db, item)
+
+    def consume(self, key: str, qty: int) -> List[dict]:
+        # Takes from the earliest-expiring batches first; returns what was taken per batch
+        if qty <= 0:
+            raise ValueError("Quantity must be positive")
+        with self.session_factory() as db:
+            item = self._locked_item(db, key)
+            # FEFO over the locked rows (the in-memory index may lag another worker's write)
+            batches = sorted((b for b in item.batches if b.quantity > 0), key=lambda b: (b.expiry, b.batch_code))
+            if sum(b.quantity for b in batches) < qty:
+                raise ValueError(f"Insufficient stock of {item.item_name}")
+            taken, remaining = [], qty
+            for b in batches:
+                if remaining == 0:
+                    break
+                used = min(b.quantity, remaining)
+                b.quantity -= used
+                remaining -= used
+                taken.append({"batch_id": b.batch_code, "expiry": b.expiry.isoformat(), "qty": used})
+            today = date.today()
+            stmt = pg_insert(models.InventoryDailyUsage).values(inventory_id=item.id, day=today, quantity=qty)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[models.InventoryDailyUsage.inventory_id, models.InventoryDailyUsage.day],
+                set_={"quantity": models.InventoryDailyUsage.quantity + stmt.excluded.quantity}
+            )
+            db.execute(stmt)
+            self._finish_write(db, item)
+            self.forecaster.record(key, qty, today)
+            return taken
+
+    # --- FORECASTING ---
+    def forecast(self):
+        self.graph # revalidate first so the forecaster reflects other workers' writes
+        return self.forecaster.forecast()
+
+    def forecast_item(self, key: str) -> Optional[dict]:
+        return self.forecast().row(key)
+
+    def reorder_report(self) -> List[dict]:
+        graph = self.graph
+        return self.forecaster.forecast().reorder_report({key: node["stock"] for key, node in graph.items()})
+
+    def stats(self) -> dict:
+        return {"version": self._version, "items": len(self._graph), "reloads": self.reloads, "forecaster": self.forecaster.stats()}
+
+def seed(db: Session):
+    # Loads the demo catalog from SupplyChainGraph into an empty inventory table
+    if db.execute(select(models.Inventory.id).limit(1)).first():
+        return False
+    suppliers = {}
+    for sku, data in SupplyChainGraph().graph.items():
+        supplier = suppliers.get(data["supplier"])
+        if supplier is None:
+            supplier = db.execute(select(models.Supplier).where(models.Supplier.name == data["supplier"])).scalar_one_or_none()
+            supplier = supplier or models.Supplier(name=data["supplier"])
+            suppliers[data["supplier"]] = supplier
+        item = models.Inventory(
+            sku=sku,
+            item_name=data["name"],
+            threshold=data["threshold"],
+            usage_rate=data["usage_rate"],
+            supplier=supplier,
+            batches=[
+                models.InventoryBatch(batch_code=b["batch_id"], expiry=date.fromisoformat(b["expiry"]), quantity=b["qty"])
+                for b in data["batches"]
+            ]
+        )
+        item.quantity = sum(b.quantity for b in item.batches)
+        item.status = stock_status(item.quantity, item.threshold)
+        db.add(item)
+    _bump_version(db)
+    db.commit()
+    return True
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    if sys.argv[1:] != ["seed"]:
+        print("usage: python inventory_store.py seed")
+        sys.exit(2)
+    with SessionLocal() as db:
+        print("✅ Demo inventory loaded." if seed(db) else "Inventory table already has items; nothing to do.")
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+import httpx
+
+# --- DENTAL LAB STATUS CLIENT ---
+# Async lookups against the lab API (GET {base_url}/orders/{order_id} ->
+# {"status": ...}). Answers are cached per lab_order_id for `ttl` seconds in
+# an LRU of at most `max_entries` (expired entries are dropped when read),
+# concurrent lookups of the same order share one request, at most
+# `max_concurrency` requests are in flight, and every call has its own
+# timeout. get_statuses() fans a whole case list out at once, so N orders
+# cost about one round trip. Failures are reported, never cached.
+
+NOT_FOUND = "Order Not Found"
+UNREACHABLE = "Lab Unreachable"
+
+class LabStatusClient:
+    def __init__(self, base_url: str, ttl: float = 60.0, max_concurrency: int = 32, timeout: float = 2.0,
+                 client: Optional[httpx.AsyncClient] = None, max_entries: int = 10000):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._client = client or httpx.AsyncClient()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache = OrderedDict() # order_id -> (expires_at, status), least recently used first
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = self.misses = self.coalesced = self.failures = 0
+
+    async def get_status(self, order_id: str) -> str:
+        cached = self._cache.get(order_id)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                self._cache.move_to_end(order_id)
+                self.hits += 1
+                return cached[1]
+            del self._cache[order_id]
+        task = self._inflight.get(order_id)
+        if task is None:
+            self.misses += 1
+            # A task of its own: a caller that gets cancelled doesn't cancel it for the others
+            task = asyncio.ensure_future(self._fetch(order_id))
+            self._inflight[order_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(order_id, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def get_statuses(self, order_ids: Iterable[str]) -> Dict[str, str]:
+        unique = list(dict.fromkeys(order_ids))
+        statuses = await asyncio.gather(*(self.get_status(order_id) for order_id in unique))
+        return dict(zip(unique, statuses))
+
+    async def _fetch(self, order_id: str) -> str:
+        async with self._semaphore:
+            try:
+                response = await asyncio.wait_for(self._client.get(f"{self.base_url}/orders/{order_id}"), self.timeout)
+            except (asyncio.TimeoutError, httpx.HTTPError):
+                self.failures += 1
+                return UNREACHABLE
+        if response.status_code == 404:
+            status = NOT_FOUND
+        elif response.status_code != 200:
+            self.failures += 1
+            return UNREACHABLE
+        else:
+            try:
+                status = response.json()["status"]
+            except (ValueError, KeyError, TypeError):
+                # Malformed body: a failure like any other, not an answer to cache
+                self.failures += 1
+                return UNREACHABLE
+        self._store(order_id, status)
+        return status
+
+    def _store(self, order_id: str, status: str):
+        self._cache[order_id] = (time.monotonic() + self.ttl, status)
+        self._cache.move_to_end(order_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "cached": len(self._cache),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "failures": self.failures
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
+
+if __name__ == "__main__":
+    import argparse
+
+    # Against a running stub: python lab_stub.py --latency-ms 200
+    parser = argparse.ArgumentParser(description="Lab status client round-trip check")
+    parser.add_argument("--url", default="http://127.0.0.1:8100")
+    parser.add_argument("--orders", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    async def main():
+        client = LabStatusClient(args.url, max_concurrency=args.concurrency)
+        ids = [f"LAB_{9900 + i}" for i in range(args.orders)]
+        for label in ("cold", "cached"):
+            start = time.perf_counter()
+            # Duplicate every id once to exercise coalescing
+            await asyncio.gather(client.get_statuses(ids), client.get_statuses(ids))
+            print(f"{label:>6}: {args.orders} orders in {(time.perf_counter() - start) * 1000:.0f} ms {client.stats()}")
+        await client.aclose()
+
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+import argparse
+import asyncio
+import os
+from fastapi import FastAPI, HTTPException
+
+# --- LOCAL DENTAL LAB API STUB ---
+# Serves GET /orders/{order_id} like the lab API that lab_client.py talks to,
+# with a configurable delay per request. Point the backend at it with
+# LAB_API_URL=http://127.0.0.1:8100.
+
+LATENCY_MS = int(os.getenv("LAB_STUB_LATENCY_MS", "200"))
+
+ORDERS = {
+    "LAB_9901": "Shipped (Arriving Tomorrow)",
+    "LAB_9902": "Processing"
+}
+
+app = FastAPI(title="Dental Lab Stub")
+app.state.requests = 0
+
+@app.get("/orders/{order_id}")
+async def get_order(order_id: str):
+    app.state.requests += 1
+    await asyncio.sleep(LATENCY_MS / 1000)
+    if order_id in ORDERS:
+        return {"order_id": order_id, "status": ORDERS[order_id]}
+    # Demo ids LAB_9900..LAB_9999 all exist
+    if order_id.startswith("LAB_99") and order_id[4:].isdigit():
+        return {"order_id": order_id, "status": "Processing"}
+    raise HTTPException(status_code=404, detail="Order not found")
+
+@app.get("/stats")
+def stats():
+    return {"requests": app.state.requests, "latency_ms": LATENCY_MS}
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local dental lab API stub")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=int, default=LATENCY_MS)
+    args = parser.parse_args()
+    LATENCY_MS = args.latency_ms
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -1,11 +1,30 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, File, Header, HTTPException, Query, Request, Response, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from datetime import datetime, timedelta, date
 from jose import jwt, JWTError
+from typing import Optional
+import asyncio, base64, io, json, os, uuid
+import anyio
 import models, database, schemas
+import dashboard_stats
+import appointment_import
+import user_provisioning
+import revenue_timeseries
+from directory_cache import doctor_directory
+from slot_index import SlotIndex, SlotError, parse_slot, slot_label
+from event_bus import DoctorEventBus
+from inventory_store import DatabaseSupplyChainGraph
+from finance_store import DatabaseFinancialGraph, normalize_status
+from principal_cache import Principal, PrincipalCache
+from password_hasher import PasswordHasher, PasswordHasherBusy, build_crypt_context
+from lab_client import LabStatusClient
 
 # --- IMPORT AGENTS ---
 # Make sure your agent files are in a folder named 'agents' with an empty __init__.py
@@ -18,18 +37,54 @@ from agents.case_agent import CaseTrackingAgent, CaseInput
 SECRET_KEY = "alshifa_super_secret_key_change_this_in_prod"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+PRINCIPAL_CACHE_SIZE = 4096
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+# Changing BCRYPT_ROUNDS rehashes each user's password on their next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+# Hashing runs inline in the request, so keep a batch to seconds of bcrypt work
+MAX_BULK_USERS = 500
+# Dental lab API; unset keeps the case agent on its built-in mock
+LAB_API_URL = os.getenv("LAB_API_URL")
+LAB_STATUS_TTL_SECONDS = float(os.getenv("LAB_STATUS_TTL_SECONDS", "60"))
+LAB_API_CONCURRENCY = int(os.getenv("LAB_API_CONCURRENCY", "32"))
+LAB_API_TIMEOUT_SECONDS = float(os.getenv("LAB_API_TIMEOUT_SECONDS", "2"))
 
 # 1. Setup Database & Security
-models.Base.metadata.create_all(bind=database.engine)
+# Schema is managed by Alembic migrations (run `alembic upgrade head`), not at import time
 app = FastAPI(title="Al-Shifa Dental API")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_crypt_context(BCRYPT_ROUNDS)
+password_hasher = PasswordHasher(pwd_context, workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_MAX_QUEUE)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+principal_cache = PrincipalCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS)
+
+slot_index = SlotIndex()
+event_bus = DoctorEventBus(database.engine.url.set(drivername="postgresql").render_as_string(hide_password=False))
+
+def agent_calendar(date_str: str, doctor_id: Optional[uuid.UUID] = None) -> list:
+    # Free slots for the scheduling agent; same fallback doctor as create_appointment
+    day = date.today() if date_str == "today" else date.fromisoformat(date_str)
+    with database.SessionLocal() as db:
+        if doctor_id is None:
+            doctor_id = db.execute(select(models.Doctor.id).limit(1)).scalar_one_or_none()
+            if doctor_id is None:
+                return []
+        return slot_index.free_slots_sync(db, doctor_id, day)
+
+lab_client = LabStatusClient(
+    LAB_API_URL, ttl=LAB_STATUS_TTL_SECONDS, max_concurrency=LAB_API_CONCURRENCY, timeout=LAB_API_TIMEOUT_SECONDS
+) if LAB_API_URL else None
+
+def agent_lab_lookup(order_ids):
+    # The case agent runs in a worker thread; hop onto the event loop that owns the client
+    return anyio.from_thread.run(lab_client.get_statuses, order_ids)
 
 # --- INITIALIZE AGENTS ---
-appt_agent = AppointmentAgent()
-inv_agent = InventoryAgent()
-fin_agent = RevenueAgent()
-case_agent = CaseTrackingAgent()
+appt_agent = AppointmentAgent(calendar=agent_calendar)
+inv_agent = InventoryAgent(memory=DatabaseSupplyChainGraph(database.SessionLocal))
+fin_agent = RevenueAgent(memory=DatabaseFinancialGraph(database.SessionLocal))
+case_agent = CaseTrackingAgent(lab_lookup=agent_lab_lookup if lab_client else None)
 
 # --- CORS SETTINGS ---
 origins = [
@@ -43,8 +98,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
+@app.exception_handler(PasswordHasherBusy)
+def password_hasher_busy_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": "Server busy, please retry"}, headers={"Retry-After": "1"})
+
+@app.on_event("startup")
+async def start_event_bus():
+    event_bus.start()
+
+@app.on_event("shutdown")
+async def stop_event_bus():
+    await event_bus.stop()
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+async def close_lab_client():
+    if lab_client:
+        await lab_client.aclose()
+
 # Dependency to get DB
 def get_db():
     db = database.SessionLocal()
@@ -53,13 +130,9 @@ def get_db():
     finally:
         db.close()
 
-# --- HELPER FUNCTIONS ---
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+get_async_db = database.get_async_db
 
+# --- HELPER FUNCTIONS ---
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -67,7 +140,25 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def load_principal(db: AsyncSession, user_id) -> Optional[Principal]:
+    # User + role profile in one query; cached afterwards
+    result = await db.execute(
+        select(models.User).options(
+            joinedload(models.User.doctor_profile),
+            joinedload(models.User.patient_profile)
+        ).where(models.User.id == user_id)
+    )
+    user = result.unique().scalar_one_or_none()
+    if user is None:
+        return None
+    profile = user.doctor_profile if user.role == "doctor" else user.patient_profile if user.role == "patient" else None
+    return Principal.from_rows(user, profile)
+
+def invalidate_principal(user_id):
+    # Call after registration, profile changes or deactivation of this user
+    principal_cache.invalidate(user_id)
+
+async def resolve_principal(token: str, db: AsyncSession) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -78,13 +169,23 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        user_id = uuid.UUID(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        principal = await load_principal(db, user_id)
+        if principal is None:
+            raise credentials_exception
+        principal_cache.put(user_id, principal)
+    return principal
+
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    return await resolve_principal(token, db)
+
+def get_current_user(principal: Principal = Depends(get_current_principal)):
+    return principal.user
 
 # --- AUTH ROUTES ---
 
@@ -92,13 +193,10 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 def read_root():
     return {"message": "Bismillāhir-Raḥmānir-Raḥīm - Al-Shifa API is Running"}
 
-@app.post("/register", response_model=schemas.UserOut)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
+def find_user_by_email(db: Session, email: str):
+    return db.query(models.User).filter(models.User.email == email).first()
 
-    hashed_password = get_password_hash(user.password)
+def create_user_records(db: Session, user: schemas.UserCreate, hashed_password: str):
     new_user = models.User(
         email=user.email,
         password_hash=hashed_password,
@@ -135,19 +233,54 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         db.add(new_patient)
 
     db.commit()
+    db.refresh(new_user)
+    return new_user
+
+def update_password_hash(db: Session, user: models.User, new_hash: str):
+    user.password_hash = new_hash
+    db.commit()
+
+# Auth routes are async: bcrypt runs on password_hasher's pool and blocking DB
+# calls go to the threadpool, so neither ties up the event loop.
+@app.post("/register", response_model=schemas.UserOut)
+async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(find_user_by_email, db, user.email)
+    if db_user:
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    hashed_password = await password_hasher.hash(user.password)
+    new_user = await run_in_threadpool(create_user_records, db, user, hashed_password)
+    invalidate_principal(new_user.id)
     return new_user
 
 @app.post("/login")
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == user_credentials.email).first()
+async def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(find_user_by_email, db, user_credentials.email)
     if not user:
         raise HTTPException(status_code=403, detail="Invalid Credentials")
-    if not verify_password(user_credentials.password, user.password_hash):
+    valid, new_hash = await password_hasher.verify_and_update(user_credentials.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=403, detail="Invalid Credentials")
+    if new_hash:
+        # Cost parameters changed since this hash was made: upgrade it transparently
+        await run_in_threadpool(update_password_hash, db, user, new_hash)
 
     access_token = create_access_token(data={"sub": str(user.id), "role": user.role})
     return {"access_token": access_token, "token_type": "bearer", "role": user.role}
 
+@app.post("/users/bulk")
+def provision_users(payload: schemas.BulkUserCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # Branch onboarding: many users + profiles, one transaction per chunk
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    if len(payload.users) > MAX_BULK_USERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_USERS} users per request")
+
+    result = user_provisioning.provision_users(db, payload.users, password_hasher)
+    if result["doctors_created"]:
+        doctor_directory.invalidate()
+    return result
+
 @app.post("/forgot-password")
 def forgot_password(request: schemas.ForgotPasswordRequest, db: Session = Depends(get_db)):
     user = db.query(models.User).filter(models.User.email == request.email).first()
@@ -161,37 +294,85 @@ def forgot_password(request: schemas.ForgotPasswordRequest, db: Session = Depend
     return {"message": "Password reset link sent to your email."}
 
 @app.get("/users/me")
-def read_users_me(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def read_users_me(principal: Principal = Depends(get_current_principal)):
+    current_user, profile = principal.user, principal.profile
+    details = profile.as_dict() if profile else None
     if current_user.role == "patient":
-        profile = db.query(models.Patient).filter(models.Patient.user_id == current_user.id).first()
-        return {"email": current_user.email, "role": current_user.role, "full_name": profile.full_name if profile else "Unknown", "details": profile}
+        return {"email": current_user.email, "role": current_user.role, "full_name": profile.full_name if profile else "Unknown", "details": details}
     elif current_user.role == "doctor":
-        profile = db.query(models.Doctor).filter(models.Doctor.user_id == current_user.id).first()
-        return {"email": current_user.email, "role": current_user.role, "full_name": profile.full_name if profile else "Doctor", "details": profile}
-    return current_user
+        return {"email": current_user.email, "role": current_user.role, "full_name": profile.full_name if profile else "Doctor", "details": details}
+    return current_user.as_dict()
+
+# --- INTERNAL: AUTH CACHE METRICS ---
+@app.get("/internal/principal-cache")
+def get_principal_cache_stats(current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    return principal_cache.stats()
+
+@app.get("/internal/password-hasher")
+def get_password_hasher_stats(current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    return password_hasher.stats()
+
+@app.get("/internal/db-pool")
+def get_db_pool_stats(current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    return database.pool_stats()
+
+@app.get("/internal/doctor-directory")
+def get_doctor_directory_stats(current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    return doctor_directory.stats()
+
+@app.get("/internal/doctor-events")
+def get_doctor_event_stats(current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    return event_bus.stats()
+
+@app.get("/internal/lab-client")
+def get_lab_client_stats(current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    return lab_client.stats() if lab_client else {"configured": False}
 
 # --- APPOINTMENT ROUTES ---
 
 @app.post("/appointments", response_model=schemas.AppointmentOut)
-def create_appointment(appt: schemas.AppointmentCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    if current_user.role != "patient":
+async def create_appointment(appt: schemas.AppointmentCreate, principal: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)):
+    if principal.role != "patient":
         raise HTTPException(status_code=400, detail="Only patients can book appointments")
     
-    patient = db.query(models.Patient).filter(models.Patient.user_id == current_user.id).first()
+    patient = principal.profile
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient profile not found")
+    try:
+        slot = parse_slot(appt.time)
+    except SlotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     doctor_id = appt.doctor_id
     doctor_name = "Unknown Dr"
     
     if not doctor_id:
-        random_doc = db.query(models.Doctor).first()
+        random_doc = (await db.execute(select(models.Doctor).limit(1))).scalar_one_or_none()
         if not random_doc:
             raise HTTPException(status_code=404, detail="No doctors available")
         doctor_id = random_doc.id
         doctor_name = random_doc.full_name
     else:
-        doc = db.query(models.Doctor).filter(models.Doctor.id == doctor_id).first()
-        doctor_name = doc.full_name if doc else "Unknown"
+        doc = await db.get(models.Doctor, doctor_id)
+        if not doc:
+            raise HTTPException(status_code=404, detail="Doctor not found")
+        doctor_name = doc.full_name
+
+    if not await slot_index.is_free(db, doctor_id, appt.date, slot):
+        raise HTTPException(status_code=409, detail="This slot is already booked")
 
-    hospital = db.query(models.Hospital).first()
+    hospital = (await db.execute(select(models.Hospital).limit(1))).scalar_one_or_none()
     hospital_id = hospital.id if hospital else None
     
     new_appt = models.Appointment(
@@ -199,13 +380,35 @@ def create_appointment(appt: schemas.AppointmentCreate, current_user: models.Use
         doctor_id=doctor_id,
         hospital_id=hospital_id, # Can be null if logic allows
         date=appt.date,
-        time=appt.time,
+        time=slot_label(slot),
         status="confirmed",
         notes=appt.reason
     )
     db.add(new_appt)
-    db.commit()
-    db.refresh(new_appt)
+    try:
+        # uq_appointments_doctor_slot makes the booking atomic across workers
+        await db.flush()
+    except IntegrityError as e:
+        await db.rollback()
+        if "uq_appointments_doctor_slot" not in str(e.orig):
+            raise
+        slot_index.mark_booked(doctor_id, appt.date, slot)
+        raise HTTPException(status_code=409, detail="This slot is already booked")
+    delta = await dashboard_stats.record_appointment_created(db, new_appt)
+    await event_bus.publish(db, doctor_id, {
+        "type": "appointment_created",
+        "date": new_appt.date,
+        "delta": delta,
+        "appointment": {
+            "id": str(new_appt.id),
+            "patient_name": patient.full_name,
+            "time": new_appt.time,
+            "status": new_appt.status,
+            "treatment": new_appt.notes or "Checkup"
+        }
+    })
+    await db.commit()
+    slot_index.mark_booked(doctor_id, appt.date, slot)
 
     return {
         "id": new_appt.id,
@@ -216,120 +419,301 @@ def create_appointment(appt: schemas.AppointmentCreate, current_user: models.Use
         "hospital_name": hospital.name if hospital else "Main Clinic"
     }
 
+@app.patch("/appointments/{appointment_id}/status")
+async def update_appointment_status(
+    appointment_id: uuid.UUID,
+    update: schemas.AppointmentStatusUpdate,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if update.status not in dashboard_stats.APPOINTMENT_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status")
+    if principal.profile is None:
+        raise HTTPException(status_code=403, detail="Access Denied")
+
+    # Row lock so concurrent status changes apply their counter deltas one at a time
+    appt = (await db.execute(
+        select(models.Appointment).where(models.Appointment.id == appointment_id).with_for_update()
+    )).scalar_one_or_none()
+    if appt is None:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    owner_id = appt.doctor_id if principal.role == "doctor" else appt.patient_id if principal.role == "patient" else None
+    if owner_id != principal.profile.id:
+        raise HTTPException(status_code=403, detail="Access Denied")
+    if principal.role == "patient" and update.status != "cancelled":
+        raise HTTPException(status_code=403, detail="Patients can only cancel appointments")
+
+    old_status = appt.status
+    appt.status = update.status
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="This slot has been booked by someone else")
+    delta = await dashboard_stats.record_status_change(db, appt, old_status)
+    await event_bus.publish(db, appt.doctor_id, {
+        "type": "status_changed",
+        "date": appt.date,
+        "delta": delta,
+        "appointment": {"id": str(appt.id), "status": appt.status, "old_status": old_status}
+    })
+    await db.commit()
+    try:
+        slot = parse_slot(appt.time)
+    except SlotError:
+        slot = None
+    if slot is not None:
+        if dashboard_stats.is_billable(appt.status):
+            slot_index.mark_booked(appt.doctor_id, appt.date, slot)
+        else:
+            slot_index.mark_free(appt.doctor_id, appt.date, slot)
+    return {"id": str(appt.id), "status": appt.status}
+
+@app.post("/appointments/import")
+def import_appointments(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    chunk_size: int = Query(appointment_import.DEFAULT_CHUNK_SIZE, ge=100, le=50000),
+    current_user: models.User = Depends(get_current_user)
+):
+    # Bulk load of historical visits (CSV or NDJSON); see appointment_import.py for the record shape
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    fmt = format or ("ndjson" if (file.filename or "").endswith((".ndjson", ".jsonl")) else "csv")
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Format must be csv or ndjson")
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    # Only the doctors that received rows get their dashboard counters rebuilt
+    return appointment_import.import_appointments(database.engine, appointment_import.iter_records(stream, fmt), chunk_size)
+
+@app.get("/doctors/{doctor_id}/slots")
+async def get_free_slots(doctor_id: uuid.UUID, day: date, db: AsyncSession = Depends(get_async_db)):
+    return {"doctor_id": str(doctor_id), "date": day, "slots": await slot_index.free_slots(db, doctor_id, day)}
+
 @app.get("/appointments/my", response_model=list[schemas.AppointmentOut])
-def get_my_appointments(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    if current_user.role == "patient":
-        patient = db.query(models.Patient).filter(models.Patient.user_id == current_user.id).first()
-        appts = db.query(models.Appointment).filter(models.Appointment.patient_id == patient.id).all()
-    elif current_user.role == "doctor":
-        doctor = db.query(models.Doctor).filter(models.Doctor.user_id == current_user.id).first()
-        appts = db.query(models.Appointment).filter(models.Appointment.doctor_id == doctor.id).all()
+async def get_my_appointments(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Single round trip: doctor and hospital names come from joins, not per-row lookups
+    stmt = select(
+        models.Appointment.id,
+        models.Appointment.date,
+        models.Appointment.time,
+        models.Appointment.status,
+        models.Doctor.full_name.label("doctor_name"),
+        models.Hospital.name.label("hospital_name")
+    ).outerjoin(models.Appointment.doctor).outerjoin(
+        models.Hospital, models.Hospital.id == models.Appointment.hospital_id
+    )
+
+    if principal.profile is None:
+        return []
+    if principal.role == "patient":
+        stmt = stmt.where(models.Appointment.patient_id == principal.profile.id)
+    elif principal.role == "doctor":
+        stmt = stmt.where(models.Appointment.doctor_id == principal.profile.id)
     else:
         return []
 
-    results = []
-    for a in appts:
-        doc = db.query(models.Doctor).filter(models.Doctor.id == a.doctor_id).first()
-        hosp = db.query(models.Hospital).filter(models.Hospital.id == a.hospital_id).first()
-        results.append({
-            "id": a.id,
-            "date": a.date,
-            "time": a.time,
-            "status": a.status,
-            "doctor_name": doc.full_name if doc else "Unknown",
-            "hospital_name": hosp.name if hosp else "Unknown"
-        })
-    return results
+    if date_from:
+        stmt = stmt.where(models.Appointment.date >= date_from)
+    if date_to:
+        stmt = stmt.where(models.Appointment.date <= date_to)
+
+    rows = (await db.execute(stmt.order_by(models.Appointment.date, models.Appointment.time))).all()
+    return [
+        {
+            "id": r.id,
+            "date": r.date,
+            "time": r.time,
+            "status": r.status,
+            "doctor_name": r.doctor_name or "Unknown",
+            "hospital_name": r.hospital_name or "Unknown"
+        }
+        for r in rows
+    ]
 
 @app.get("/doctors")
-def get_all_doctors(db: Session = Depends(get_db)):
-    doctors = db.query(models.Doctor).all()
-    results = []
-    for doc in doctors:
-        hospital = db.query(models.Hospital).filter(models.Hospital.id == doc.hospital_id).first()
-        results.append({
-            "id": str(doc.id),
-            "full_name": doc.full_name,
-            "specialization": doc.specialization,
-            "hospital_name": hospital.name if hospital else "Unknown Clinic",
-            "location": hospital.location if hospital else "City Center"
-        })
-    return results
+async def get_all_doctors(
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Served from the in-process snapshot; the session only connects to recheck the version
+    snapshot = await doctor_directory.get(db)
+    if snapshot.matches(if_none_match, if_modified_since):
+        return Response(status_code=304, headers=snapshot.headers())
+    return Response(content=snapshot.body, media_type="application/json", headers=snapshot.headers())
 
 @app.get("/doctor/dashboard")
-def get_doctor_dashboard(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    if current_user.role != "doctor":
+async def get_doctor_dashboard(principal: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)):
+    if principal.role != "doctor":
         raise HTTPException(status_code=403, detail="Access Denied")
     
-    doctor = db.query(models.Doctor).filter(models.Doctor.user_id == current_user.id).first()
+    doctor = principal.profile
     if not doctor:
         raise HTTPException(status_code=404, detail="Doctor profile not found")
 
     today = date.today()
-    todays_appts = db.query(models.Appointment).filter(models.Appointment.doctor_id == doctor.id, models.Appointment.date == today).all()
+    todays_appts = (await db.execute(
+        select(
+            models.Appointment.id,
+            models.Appointment.time,
+            models.Appointment.status,
+            models.Appointment.notes,
+            models.Patient.full_name.label("patient_name")
+        ).outerjoin(models.Appointment.patient).where(
+            models.Appointment.doctor_id == doctor.id, models.Appointment.date == today
+        ).order_by(models.Appointment.time)
+    )).all()
     
     appt_list = []
     for a in todays_appts:
-        patient = db.query(models.Patient).filter(models.Patient.id == a.patient_id).first()
         appt_list.append({
             "id": str(a.id),
-            "patient_name": patient.full_name if patient else "Unknown",
+            "patient_name": a.patient_name or "Unknown",
             "time": a.time,
             "status": a.status,
             "treatment": a.notes or "Checkup"
         })
 
+    counters = await dashboard_stats.read_dashboard_counters(db, doctor.id, today)
+
     return {
-        "today_count": len(todays_appts),
-        "total_patients": db.query(models.Appointment.patient_id).filter(models.Appointment.doctor_id == doctor.id).distinct().count(),
-        "revenue": len(todays_appts) * 1500,
+        "date": today,
+        "today_count": counters["today_count"],
+        "total_patients": counters["total_patients"],
+        "revenue": counters["revenue"],
         "appointments": appt_list
     }
 
+# --- DOCTOR EVENT STREAM (SSE) ---
+SSE_HEARTBEAT_SECONDS = 15
+
+@app.get("/doctor/events")
+async def stream_doctor_events(request: Request, token: str):
+    # EventSource can't send an Authorization header, so the JWT comes as ?token=.
+    # Short-lived session: nothing holds a pool connection while the stream is open.
+    async with database.AsyncSessionLocal() as db:
+        principal = await resolve_principal(token, db)
+    if principal.role != "doctor" or principal.profile is None:
+        raise HTTPException(status_code=403, detail="Access Denied")
+    doctor_id = principal.profile.id
+
+    async def event_stream():
+        queue = event_bus.subscribe(doctor_id)
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {json.dumps(event, default=str)}\n\n"
+        finally:
+            event_bus.unsubscribe(doctor_id, queue)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def escape_like(value: str) -> str:
+    # Literal text inside a LIKE pattern: %, _ and the escape character itself
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+PATIENT_SORT_FIELDS = {
+    "last_visit": "last_visit",
+    "name": "full_name",
+    "age": "age",
+}
+
 @app.get("/doctor/patients")
-def get_my_patients(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    if current_user.role != "doctor":
+async def get_my_patients(
+    sort: str = "last_visit",
+    order: str = "desc",
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    q: Optional[str] = None,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if principal.role != "doctor":
         raise HTTPException(status_code=403, detail="Access Denied")
-    
-    doctor = db.query(models.Doctor).filter(models.Doctor.user_id == current_user.id).first()
-    patient_ids = db.query(models.Appointment.patient_id).filter(models.Appointment.doctor_id == doctor.id).distinct().all()
-    ids = [p[0] for p in patient_ids]
-    patients = db.query(models.Patient).filter(models.Patient.id.in_(ids)).all()
-    
-    results = []
-    for p in patients:
-        last_appt = db.query(models.Appointment).filter(models.Appointment.patient_id == p.id, models.Appointment.doctor_id == doctor.id).order_by(models.Appointment.date.desc()).first()
-        results.append({
+    if sort not in PATIENT_SORT_FIELDS or order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid sort parameters")
+
+    doctor = principal.profile
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor profile not found")
+
+    # Latest appointment per patient in one pass (ROW_NUMBER over the doctor's appointments)
+    ranked = select(
+        models.Appointment.patient_id.label("patient_id"),
+        models.Appointment.date.label("last_visit"),
+        models.Appointment.notes.label("notes"),
+        func.row_number().over(
+            partition_by=models.Appointment.patient_id,
+            order_by=(models.Appointment.date.desc(), models.Appointment.time.desc())
+        ).label("rn")
+    ).where(models.Appointment.doctor_id == doctor.id).subquery()
+
+    sort_col = ranked.c.last_visit if sort == "last_visit" else getattr(models.Patient, PATIENT_SORT_FIELDS[sort])
+    sort_col = sort_col.desc() if order == "desc" else sort_col.asc()
+
+    stmt = select(models.Patient, ranked.c.last_visit, ranked.c.notes).join(
+        ranked, ranked.c.patient_id == models.Patient.id
+    ).where(ranked.c.rn == 1)
+    if q:
+        # Name search runs server-side so it covers every page, not just the loaded one
+        stmt = stmt.where(models.Patient.full_name.ilike(f"%{escape_like(q)}%", escape="\\"))
+    rows = (await db.execute(stmt.order_by(sort_col, models.Patient.id).offset(offset).limit(limit))).all()
+
+    return [
+        {
             "id": str(p.id),
             "name": p.full_name,
             "age": p.age,
             "gender": p.gender,
-            "last_visit": last_appt.date if last_appt else None,
-            "condition": last_appt.notes or "Checkup",
+            "last_visit": last_visit,
+            "condition": notes or "Checkup",
             "status": "Active"
-        })
-    return results
+        }
+        for p, last_visit, notes in rows
+    ]
 
 # --- AGENTIC AI ENDPOINTS ---
 
 @app.post("/agent/appointment")
-def chat_appointment(input_data: ApptInput):
-    # Agent 1: Appointment & History
+def chat_appointment(input_data: ApptInput, principal: Principal = Depends(get_current_principal)):
+    # Agent 1: Appointment & History (patients book through it too, so any signed-in user)
     return appt_agent.process_request(input_data)
 
 @app.post("/agent/inventory")
-def chat_inventory(input_data: InventoryInput):
-    # Agent 2: Inventory
+def chat_inventory(input_data: InventoryInput, principal: Principal = Depends(get_current_principal)):
+    # Agent 2: Inventory (answers from the clinic's stock tables)
+    if principal.role != "doctor":
+        raise HTTPException(status_code=403, detail="Access Denied")
     return inv_agent.process_request(input_data)
 
 @app.post("/agent/finance")
-def chat_finance(input_data: FinanceInput):
-    # Agent 3: Revenue
-    return fin_agent.process_request(input_data)
+def chat_finance(input_data: FinanceInput, principal: Principal = Depends(get_current_principal)):
+    # Agent 3: Revenue, limited to the signed-in doctor's invoices
+    # The role comes from the token, never from the request body
+    input_data = FinanceInput(user_query=input_data.user_query, role=principal.role)
+    if principal.role != "doctor":
+        return fin_agent.process_request(input_data)
+    if not principal.profile:
+        raise HTTPException(status_code=404, detail="Doctor profile not found")
+    return fin_agent.process_request(input_data, doctor_id=principal.profile.id)
 
 @app.post("/agent/case")
-def chat_case(input_data: CaseInput):
+def chat_case(input_data: CaseInput, principal: Principal = Depends(get_current_principal)):
     # Agent 4: Case Tracking
+    if principal.role != "doctor":
+        raise HTTPException(status_code=403, detail="Access Denied")
     return case_agent.process_request(input_data)
 
 #          --- DOCTOR DASHBOARD ANALYTICS ---
@@ -342,6 +726,7 @@ def get_inventory(current_user: models.User = Depends(get_current_user)):
     
     # Access the Inventory Agent's Memory directly
     graph_data = inv_agent.memory.graph
+    forecast = inv_agent.memory.forecast()
     
     inventory_list = []
     for item_id, data in graph_data.items():
@@ -358,54 +743,270 @@ def get_inventory(current_user: models.User = Depends(get_current_user)):
             "stock": data["stock"],
             "reorder_level": data["threshold"],
             "status": status,
-            "supplier": data["supplier"]
+            "supplier": data["supplier"],
+            **(forecast.row(item_id) or {})
         })
     
     return inventory_list
 
+@app.get("/doctor/inventory/reorder")
+def get_reorder_report(current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "doctor":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    graph_data = inv_agent.memory.graph
+    report = inv_agent.memory.reorder_report()
+    for row in report:
+        row["name"] = graph_data[row["item_id"]]["name"] if row["item_id"] in graph_data else row["item_id"]
+    return report
+
+@app.get("/doctor/inventory/search")
+def search_inventory(q: str, limit: int = Query(10, ge=1, le=100), current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "doctor":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    graph_data = inv_agent.memory.graph
+    results = []
+    for item_id, score in inv_agent.memory.search_items(q, limit):
+        data = graph_data.get(item_id)
+        if data:
+            results.append({"id": item_id, "name": data["name"], "stock": data["stock"], "supplier": data["supplier"], "score": score})
+    return results
+
+@app.get("/doctor/inventory/expiring")
+def get_expiring_inventory(days: int = Query(30, ge=0, le=3650), current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "doctor":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    return inv_agent.memory.expiring_within(days)
+
+# --- INVENTORY WRITE ENDPOINTS (write-through to inventory_store) ---
+@app.post("/doctor/inventory/{item_id}/batches")
+def add_inventory_batch(item_id: str, batch: schemas.InventoryBatchIn, current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "doctor":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    try:
+        return inv_agent.memory.add_batch(item_id, batch.batch_id, batch.expiry, batch.qty)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Item not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/doctor/inventory/{item_id}/consume")
+def consume_inventory(item_id: str, usage: schemas.InventoryConsume, current_user: models.User = Depends(get_current_user)):
+    if current_user.role != "doctor":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    try:
+        return {"item_id": item_id, "taken": inv_agent.memory.consume(item_id, usage.qty)}
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Item not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 # --- NEW: FINANCE READ ENDPOINT ---
+INVOICE_FIELDS = ("id", "patient_id", "patient_name", "procedure", "amount", "status", "date", "appointment_id")
+
+def encode_invoice_cursor(inv_date: str, inv_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{inv_date}|{inv_id}".encode()).decode()
+
+def decode_invoice_cursor(cursor: str):
+    try:
+        raw_date, raw_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return date.fromisoformat(raw_date).isoformat(), raw_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @app.get("/doctor/finance")
-def get_finance_stats(current_user: models.User = Depends(get_current_user)):
-    if current_user.role != "doctor":
+def get_finance_stats(
+    response: Response,
+    summary: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None,
+    procedure: Optional[str] = None,
+    fields: Optional[str] = None,
+    principal: Principal = Depends(get_current_principal)
+):
+    if principal.role != "doctor":
         raise HTTPException(status_code=403, detail="Access Denied")
+    doctor = principal.profile
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor profile not found")
     
-    # Access the Revenue Agent's Graph Memory
-    invoices = list(fin_agent.memory.graph.values())
-    
-    # Calculate Real-Time Stats
-    total_revenue = sum(inv['amount'] for inv in invoices if inv['status'] == 'Paid')
-    total_pending = sum(inv['amount'] for inv in invoices if inv['status'] == 'Pending')
-    
-    return {
-        "total_revenue": total_revenue,
-        "total_pending": total_pending,
-        "invoices": invoices  # List of all invoices for the table
+    # Totals come from the daily revenue rollups (finance_store.py), never the invoices
+    totals = fin_agent.memory.totals(doctor.id, procedure, date_from, date_to)
+    result = {
+        "total_revenue": totals["Paid"]["amount"],
+        "total_pending": totals["Pending"]["amount"]
     }
+    if summary:
+        return result
+
+    selected = INVOICE_FIELDS
+    if fields:
+        selected = tuple(f.strip() for f in fields.split(",") if f.strip())
+        unknown = set(selected) - set(INVOICE_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        if "id" not in selected:
+            selected = ("id",) + selected
+
+    # Newest first; one extra row tells us whether another page exists
+    try:
+        invoices = fin_agent.memory.page_invoices(
+            limit + 1,
+            after=decode_invoice_cursor(cursor) if cursor else None,
+            date_from=date_from.isoformat() if date_from else None,
+            date_to=date_to.isoformat() if date_to else None,
+            status=status,
+            procedure=procedure,
+            doctor_id=doctor.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(invoices) > limit:
+        invoices = invoices[:limit]
+        response.headers["X-Next-Cursor"] = encode_invoice_cursor(invoices[-1]["date"], invoices[-1]["id"])
+
+    result["invoices"] = [{f: inv[f] for f in selected} for inv in invoices]
+    return result
+
+@app.get("/doctor/finance/timeseries")
+async def get_finance_timeseries(
+    granularity: str = "day",
+    split: str = "none",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[str] = None,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if principal.role != "doctor":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    doctor = principal.profile
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor profile not found")
+    if granularity not in revenue_timeseries.GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(revenue_timeseries.GRANULARITIES)}")
+    if split not in revenue_timeseries.SPLITS:
+        raise HTTPException(status_code=400, detail=f"split must be one of {', '.join(revenue_timeseries.SPLITS)}")
+    try:
+        status = normalize_status(status) if status else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Default window: the last 90 days; capped at ~5 years of day buckets
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=89)
+    if date_from > date_to or (date_to - date_from).days > 1830:
+        raise HTTPException(status_code=400, detail="Invalid date range")
+
+    columns = await revenue_timeseries.load_rollup_columns(db, doctor.id, date_from, date_to, split, status)
+    return revenue_timeseries.bucketize(
+        columns["days"], columns["amounts"], columns["counts"], columns["groups"], columns["labels"],
+        date_from, date_to, granularity
+    )
+
+# --- FINANCE WRITE ENDPOINTS (invoice + rollup in one transaction, finance_store) ---
+@app.post("/doctor/invoices")
+def create_invoice(invoice: schemas.InvoiceCreate, principal: Principal = Depends(get_current_principal)):
+    if principal.role != "doctor":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    if not principal.profile:
+        raise HTTPException(status_code=404, detail="Doctor profile not found")
+    try:
+        return fin_agent.memory.create_invoice(principal.profile.id, invoice.appointment_id, invoice.procedure, invoice.amount, invoice.status)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.patch("/doctor/invoices/{invoice_id}/status")
+def update_invoice_status(invoice_id: uuid.UUID, update: schemas.InvoiceStatusUpdate, principal: Principal = Depends(get_current_principal)):
+    if principal.role != "doctor":
+        raise HTTPException(status_code=403, detail="Access Denied")
+    if not principal.profile:
+        raise HTTPException(status_code=404, detail="Doctor profile not found")
+    try:
+        return fin_agent.memory.set_status(invoice_id, update.status, doctor_id=principal.profile.id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # --- NEW: SCHEDULE READ ENDPOINT ---
+def encode_schedule_cursor(appt_date: date, appt_time: str, appt_id) -> str:
+    raw = f"{appt_date.isoformat()}|{appt_time}|{appt_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_schedule_cursor(cursor: str):
+    try:
+        raw_date, raw_time, raw_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 2)
+        return date.fromisoformat(raw_date), raw_time, uuid.UUID(raw_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def schedule_query(doctor_id, cursor: Optional[str] = None):
+    # Keyset over (date, time, id) with the patient name joined in
+    stmt = select(
+        models.Appointment.id,
+        models.Appointment.date,
+        models.Appointment.time,
+        models.Appointment.notes,
+        models.Appointment.status,
+        models.Patient.full_name.label("patient_name")
+    ).outerjoin(models.Appointment.patient).where(
+        models.Appointment.doctor_id == doctor_id,
+        models.Appointment.date >= date.today()
+    )
+    if cursor:
+        stmt = stmt.where(
+            tuple_(models.Appointment.date, models.Appointment.time, models.Appointment.id) > decode_schedule_cursor(cursor)
+        )
+    return stmt.order_by(models.Appointment.date, models.Appointment.time, models.Appointment.id)
+
+def schedule_row(row) -> dict:
+    return {
+        "id": str(row.id),
+        "date": row.date,
+        "time": row.time,
+        "patient_name": row.patient_name or "Unknown",
+        "type": row.notes or "General Checkup",
+        "status": row.status
+    }
+
+async def stream_schedule(doctor_id, cursor: Optional[str]):
+    # Own session: the request-scoped one is closed before a streamed body is sent
+    async with database.AsyncSessionLocal() as db:
+        result = await db.stream(schedule_query(doctor_id, cursor).execution_options(yield_per=500))
+        async for row in result:
+            yield json.dumps(schedule_row(row), default=str) + "\n"
+
 @app.get("/doctor/schedule")
-def get_doctor_schedule(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    if current_user.role != "doctor":
+async def get_doctor_schedule(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    stream: bool = False,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if principal.role != "doctor":
         raise HTTPException(status_code=403, detail="Access Denied")
     
-    doctor = db.query(models.Doctor).filter(models.Doctor.user_id == current_user.id).first()
-    
-    # Fetch all upcoming appointments
-    upcoming_appts = db.query(models.Appointment).filter(
-        models.Appointment.doctor_id == doctor.id,
-        models.Appointment.date >= date.today()
-    ).order_by(models.Appointment.date, models.Appointment.time).all()
-    
-    schedule_data = []
-    for appt in upcoming_appts:
-        patient = db.query(models.Patient).filter(models.Patient.id == appt.patient_id).first()
-        schedule_data.append({
-            "id": str(appt.id),
-            "date": appt.date,
-            "time": appt.time,
-            "patient_name": patient.full_name if patient else "Unknown",
-            "type": appt.notes or "General Checkup",
-            "status": appt.status
-        })
-        
-    return schedule_data
\ No newline at end of file
+    doctor = principal.profile
+    if not doctor:
+        raise HTTPException(status_code=404, detail="Doctor profile not found")
+
+    if stream:
+        if cursor:
+            decode_schedule_cursor(cursor)
+        return StreamingResponse(stream_schedule(doctor.id, cursor), media_type="application/x-ndjson")
+
+    # Fetch one extra row to know whether another page exists
+    rows = (await db.execute(schedule_query(doctor.id, cursor).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_schedule_cursor(last.date, last.time, last.id)
+
+    return [schedule_row(r) for r in rows]
@@ -0,0 +1,85 @@
+"""initial schema (tables previously created by create_all)
+
+Existing databases: run `alembic stamp 0001` once, then `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "hospitals",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("location", sa.String(), nullable=False),
+        sa.Column("contact", sa.String(), nullable=True),
+    )
+
+    op.create_table(
+        "doctors",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("hospital_id", UUID(as_uuid=True), sa.ForeignKey("hospitals.id"), nullable=True),
+        sa.Column("full_name", sa.String(), nullable=False),
+        sa.Column("specialization", sa.String(), nullable=False),
+        sa.Column("license_number", sa.String(), nullable=True),
+        sa.Column("is_verified", sa.Boolean(), nullable=True),
+    )
+
+    op.create_table(
+        "patients",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("full_name", sa.String(), nullable=False),
+        sa.Column("age", sa.Integer(), nullable=True),
+        sa.Column("gender", sa.String(), nullable=True),
+    )
+
+    op.create_table(
+        "appointments",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("patient_id", UUID(as_uuid=True), sa.ForeignKey("patients.id"), nullable=True),
+        sa.Column("doctor_id", UUID(as_uuid=True), sa.ForeignKey("doctors.id"), nullable=True),
+        sa.Column("hospital_id", UUID(as_uuid=True), sa.ForeignKey("hospitals.id"), nullable=True),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("time", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+    )
+
+    op.create_table(
+        "inventory",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("hospital_id", UUID(as_uuid=True), sa.ForeignKey("hospitals.id"), nullable=True),
+        sa.Column("item_name", sa.String(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+    )
+
+def downgrade():
+    op.drop_table("inventory")
+    op.drop_table("appointments")
+    op.drop_table("patients")
+    op.drop_table("doctors")
+    op.drop_table("hospitals")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_table("users")
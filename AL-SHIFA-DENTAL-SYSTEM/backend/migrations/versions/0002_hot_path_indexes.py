@@ -0,0 +1,27 @@
+"""indexes for the hot filters in main.py
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Doctor day view (doctor_id, date) and schedule keyset (doctor_id, date, time, id)
+    op.create_index("ix_appointments_doctor_date_time", "appointments", ["doctor_id", "date", "time", "id"])
+    # Patient history on /appointments/my
+    op.create_index("ix_appointments_patient_date", "appointments", ["patient_id", "date"])
+    # Profile lookup by user on nearly every authenticated request
+    op.create_index("ix_doctors_user_id", "doctors", ["user_id"])
+    op.create_index("ix_patients_user_id", "patients", ["user_id"])
+
+def downgrade():
+    op.drop_index("ix_patients_user_id", table_name="patients")
+    op.drop_index("ix_doctors_user_id", table_name="doctors")
+    op.drop_index("ix_appointments_patient_date", table_name="appointments")
+    op.drop_index("ix_appointments_doctor_date_time", table_name="appointments")
@@ -0,0 +1,41 @@
+"""per-doctor dashboard counters
+
+Populate after upgrading with `python dashboard_stats.py rebuild`.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "doctor_stats",
+        sa.Column("doctor_id", UUID(as_uuid=True), sa.ForeignKey("doctors.id"), primary_key=True),
+        sa.Column("total_patients", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "doctor_daily_stats",
+        sa.Column("doctor_id", UUID(as_uuid=True), sa.ForeignKey("doctors.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("appointment_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("patient_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("billed_revenue", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "doctor_patients",
+        sa.Column("doctor_id", UUID(as_uuid=True), sa.ForeignKey("doctors.id"), primary_key=True),
+        sa.Column("patient_id", UUID(as_uuid=True), sa.ForeignKey("patients.id"), primary_key=True),
+    )
+
+def downgrade():
+    op.drop_table("doctor_patients")
+    op.drop_table("doctor_daily_stats")
+    op.drop_table("doctor_stats")
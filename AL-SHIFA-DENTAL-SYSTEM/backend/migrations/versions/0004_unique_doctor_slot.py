@@ -0,0 +1,28 @@
+"""one active appointment per doctor slot
+
+Fails if the table already holds double bookings; resolve those first
+(cancel or move the duplicates) and re-run.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index(
+        "uq_appointments_doctor_slot",
+        "appointments",
+        ["doctor_id", "date", "time"],
+        unique=True,
+        postgresql_where=sa.text("status <> 'cancelled'"),
+    )
+
+def downgrade():
+    op.drop_index("uq_appointments_doctor_slot", table_name="appointments")
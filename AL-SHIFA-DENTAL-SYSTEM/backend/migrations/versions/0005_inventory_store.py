@@ -0,0 +1,54 @@
+"""inventory persisted: suppliers, batches and cache versions
+
+Load the demo catalog afterwards with `python inventory_store.py seed`.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "suppliers",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False, unique=True),
+        sa.Column("contact", sa.String(), nullable=True),
+    )
+    op.add_column("inventory", sa.Column("sku", sa.String(), nullable=True))
+    op.add_column("inventory", sa.Column("threshold", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("inventory", sa.Column("usage_rate", sa.Float(), nullable=False, server_default="0"))
+    op.add_column("inventory", sa.Column("supplier_id", UUID(as_uuid=True), sa.ForeignKey("suppliers.id"), nullable=True))
+    op.create_unique_constraint("inventory_sku_key", "inventory", ["sku"])
+    op.create_table(
+        "inventory_batches",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("inventory_id", UUID(as_uuid=True), sa.ForeignKey("inventory.id"), nullable=False),
+        sa.Column("batch_code", sa.String(), nullable=False),
+        sa.Column("expiry", sa.Date(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_inventory_batches_inventory_id", "inventory_batches", ["inventory_id"])
+    op.create_table(
+        "cache_versions",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+def downgrade():
+    op.drop_table("cache_versions")
+    op.drop_index("ix_inventory_batches_inventory_id", table_name="inventory_batches")
+    op.drop_table("inventory_batches")
+    op.drop_constraint("inventory_sku_key", "inventory", type_="unique")
+    op.drop_column("inventory", "supplier_id")
+    op.drop_column("inventory", "usage_rate")
+    op.drop_column("inventory", "threshold")
+    op.drop_column("inventory", "sku")
+    op.drop_table("suppliers")
@@ -0,0 +1,27 @@
+"""inventory daily usage log for run-out forecasting
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "inventory_daily_usage",
+        sa.Column("inventory_id", UUID(as_uuid=True), sa.ForeignKey("inventory.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("quantity", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_inventory_daily_usage_day", "inventory_daily_usage", ["day"])
+
+def downgrade():
+    op.drop_index("ix_inventory_daily_usage_day", table_name="inventory_daily_usage")
+    op.drop_table("inventory_daily_usage")
@@ -0,0 +1,57 @@
+"""invoices partitioned by month, with daily revenue rollups
+
+Monthly partitions are created for 2024-01 through 2027-12 plus a DEFAULT
+partition; add later months ahead of time with
+`python finance_store.py partitions`.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "invoices",
+        sa.Column("id", UUID(as_uuid=True), nullable=False),
+        sa.Column("issued_on", sa.Date(), nullable=False),
+        sa.Column("doctor_id", UUID(as_uuid=True), sa.ForeignKey("doctors.id"), nullable=False),
+        sa.Column("patient_id", UUID(as_uuid=True), sa.ForeignKey("patients.id"), nullable=False),
+        sa.Column("appointment_id", UUID(as_uuid=True), sa.ForeignKey("appointments.id"), nullable=True),
+        sa.Column("procedure", sa.String(), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="Pending"),
+        sa.PrimaryKeyConstraint("id", "issued_on"),
+        postgresql_partition_by="RANGE (issued_on)",
+    )
+    op.create_index("ix_invoices_doctor_issued", "invoices", ["doctor_id", "issued_on", "id"])
+    op.create_index("ix_invoices_patient", "invoices", ["patient_id"])
+    for year in range(2024, 2028):
+        for month in range(1, 13):
+            end = f"{year + 1}-01-01" if month == 12 else f"{year}-{month + 1:02d}-01"
+            op.execute(
+                f"CREATE TABLE invoices_y{year}m{month:02d} PARTITION OF invoices "
+                f"FOR VALUES FROM ('{year}-{month:02d}-01') TO ('{end}')"
+            )
+    op.execute("CREATE TABLE invoices_default PARTITION OF invoices DEFAULT")
+    op.create_table(
+        "revenue_daily_rollups",
+        sa.Column("doctor_id", UUID(as_uuid=True), sa.ForeignKey("doctors.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("procedure", sa.String(), primary_key=True),
+        sa.Column("status", sa.String(), primary_key=True),
+        sa.Column("amount", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("invoice_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+def downgrade():
+    op.drop_table("revenue_daily_rollups")
+    # Dropping the parent drops every partition
+    op.drop_table("invoices")
@@ -0,0 +1,32 @@
+"""store appointment times as sortable 24-hour HH:MM
+
+Slots used to be stored as "02:30 PM", which doesn't sort by time, so every
+ORDER BY time (schedule keyset pages, dashboard) put the afternoon first.
+Fails if a doctor has the same slot stored in both spellings (e.g. "14:00" and
+"02:00 PM"), since uq_appointments_doctor_slot would then be violated; cancel
+the duplicate first and re-run.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.execute(
+        "UPDATE appointments "
+        "SET time = to_char(to_timestamp(upper(replace(time, ' ', '')), 'HH12:MIAM'), 'HH24:MI') "
+        "WHERE time ~* '^\\s*\\d{1,2}:\\d{2}\\s*[AP]M\\s*$'"
+    )
+
+def downgrade():
+    op.execute(
+        "UPDATE appointments "
+        "SET time = to_char(to_timestamp(time, 'HH24:MI'), 'HH12:MI AM') "
+        "WHERE time ~ '^\\d{2}:\\d{2}$'"
+    )
@@ -0,0 +1,25 @@
+"""seed the doctor directory cache version
+
+GET /doctors snapshots are keyed on this cache_versions row, which writers bump
+in the same transaction as their Doctor/Hospital changes, so every worker can
+tell when its snapshot is stale.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.execute(
+        "INSERT INTO cache_versions (name, version) VALUES ('doctor_directory', 0) "
+        "ON CONFLICT (name) DO NOTHING"
+    )
+
+def downgrade():
+    op.execute("DELETE FROM cache_versions WHERE name = 'doctor_directory'")
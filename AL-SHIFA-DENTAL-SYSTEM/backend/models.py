@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Date, Time, Text, Enum
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Boolean, ForeignKey, Date, Time, Text, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -28,7 +28,7 @@ class Hospital(Base):
 class Doctor(Base):
     __tablename__ = "doctors"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
     hospital_id = Column(UUID(as_uuid=True), ForeignKey("hospitals.id"))
     full_name = Column(String, nullable=False)
     specialization = Column(String, nullable=False)
@@ -45,7 +45,7 @@ class Doctor(Base):
 class Patient(Base):
     __tablename__ = "patients"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
     full_name = Column(String, nullable=False)
     age = Column(Integer)
     gender = Column(String)
@@ -55,6 +55,13 @@ class Patient(Base):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    # Matches the hot filters: doctor day view / schedule keyset, patient history
+    __table_args__ = (
+        Index("ix_appointments_doctor_date_time", "doctor_id", "date", "time", "id"),
+        Index("ix_appointments_patient_date", "patient_id", "date"),
+        # One active booking per doctor slot; cancelled rows free the slot
+        Index("uq_appointments_doctor_slot", "doctor_id", "date", "time", unique=True, postgresql_where=text("status <> 'cancelled'")),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id"))
     doctor_id = Column(UUID(as_uuid=True), ForeignKey("doctors.id"))
@@ -67,12 +74,101 @@ class Appointment(Base):
     patient = relationship("Patient", back_populates="appointments")
     doctor = relationship("Doctor", back_populates="appointments")
 
+# --- INVOICES (range-partitioned by month; rollups maintained by finance_store.py) ---
+class Invoice(Base):
+    __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_doctor_issued", "doctor_id", "issued_on", "id"),
+        Index("ix_invoices_patient", "patient_id"),
+        {"postgresql_partition_by": "RANGE (issued_on)"},
+    )
+    # The partition key has to be part of the primary key
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    issued_on = Column(Date, primary_key=True)
+    doctor_id = Column(UUID(as_uuid=True), ForeignKey("doctors.id"), nullable=False)
+    patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=False)
+    appointment_id = Column(UUID(as_uuid=True), ForeignKey("appointments.id"), nullable=True)
+    procedure = Column(String, nullable=False)
+    amount = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="Pending") # Pending, Paid, Cancelled
+
+    patient = relationship("Patient")
+    appointment = relationship("Appointment")
+
+class RevenueDailyRollup(Base):
+    # Running amount/count per doctor x day x procedure x status, written with each invoice change
+    __tablename__ = "revenue_daily_rollups"
+    doctor_id = Column(UUID(as_uuid=True), ForeignKey("doctors.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    procedure = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    amount = Column(BigInteger, nullable=False, default=0)
+    invoice_count = Column(Integer, nullable=False, default=0)
+
+class Supplier(Base):
+    __tablename__ = "suppliers"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String, unique=True, nullable=False)
+    contact = Column(String, nullable=True)
+
+    items = relationship("Inventory", back_populates="supplier")
+
 class Inventory(Base):
     __tablename__ = "inventory"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     hospital_id = Column(UUID(as_uuid=True), ForeignKey("hospitals.id"))
+    sku = Column(String, unique=True, nullable=True) # e.g. ITEM_001
     item_name = Column(String, nullable=False)
-    quantity = Column(Integer, default=0)
+    quantity = Column(Integer, default=0) # sum of batch quantities
     status = Column(String, default="Good") # Good, Low, Critical
+    threshold = Column(Integer, nullable=False, default=0) # reorder level
+    usage_rate = Column(Float, nullable=False, default=0.0) # units per day (avg)
+    supplier_id = Column(UUID(as_uuid=True), ForeignKey("suppliers.id"), nullable=True)
     
-    hospital = relationship("Hospital", back_populates="inventory")
\ No newline at end of file
+    hospital = relationship("Hospital", back_populates="inventory")
+    supplier = relationship("Supplier", back_populates="items")
+    batches = relationship("InventoryBatch", back_populates="item")
+
+class InventoryBatch(Base):
+    __tablename__ = "inventory_batches"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    inventory_id = Column(UUID(as_uuid=True), ForeignKey("inventory.id"), nullable=False, index=True)
+    batch_code = Column(String, nullable=False) # e.g. B-901
+    expiry = Column(Date, nullable=False)
+    quantity = Column(Integer, nullable=False, default=0)
+
+    item = relationship("Inventory", back_populates="batches")
+
+class InventoryDailyUsage(Base):
+    # Units consumed per item per day; feeds the run-out forecaster (inventory_forecast.py)
+    __tablename__ = "inventory_daily_usage"
+    inventory_id = Column(UUID(as_uuid=True), ForeignKey("inventory.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+
+class CacheVersion(Base):
+    # Bumped in the same transaction as a write; per-process caches compare and reload
+    __tablename__ = "cache_versions"
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+# --- DASHBOARD COUNTERS (maintained by dashboard_stats.py) ---
+class DoctorStats(Base):
+    __tablename__ = "doctor_stats"
+    doctor_id = Column(UUID(as_uuid=True), ForeignKey("doctors.id"), primary_key=True)
+    total_patients = Column(Integer, nullable=False, default=0)
+
+class DoctorDailyStats(Base):
+    __tablename__ = "doctor_daily_stats"
+    doctor_id = Column(UUID(as_uuid=True), ForeignKey("doctors.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    appointment_count = Column(Integer, nullable=False, default=0)
+    patient_count = Column(Integer, nullable=False, default=0)
+    billed_revenue = Column(Integer, nullable=False, default=0)
+
+class DoctorPatient(Base):
+    # One row per (doctor, patient) pair ever booked; the PK makes first-visit detection atomic
+    __tablename__ = "doctor_patients"
+    doctor_id = Column(UUID(as_uuid=True), ForeignKey("doctors.id"), primary_key=True)
+    patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id"), primary_key=True)
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from passlib.context import CryptContext
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+def build_crypt_context(rounds: int) -> CryptContext:
+    # min/max pinned to `rounds` so any hash with a different cost is flagged for rehash
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+# --- DEDICATED BCRYPT EXECUTOR ---
+# bcrypt holds a thread for tens of milliseconds per call. Running it on its own
+# small pool keeps the event loop and FastAPI's shared threadpool free, and the
+# in-flight limit turns a login rush into fast 503s instead of a global stall.
+class PasswordHasher:
+    def __init__(self, context: CryptContext, workers: int, max_queue: int):
+        self.context = context
+        self.workers = workers
+        self.max_in_flight = workers + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _acquire(self):
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self.in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def _run(self, fn, *args):
+        self._acquire()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        # Returns (valid, new_hash); new_hash is set when the stored cost parameters are outdated
+        return await self._run(self.context.verify_and_update, password, password_hash)
+
+    def hash_many(self, passwords: List[str]) -> List[str]:
+        # Bulk provisioning on the shared pool, `workers` hashes at a time: a batch
+        # never uses more CPUs than the pool has, and logins queued meanwhile
+        # interleave with it instead of waiting for the whole batch
+        hashes = []
+        for start in range(0, len(passwords), self.workers):
+            futures = [self._executor.submit(self.context.hash, p) for p in passwords[start:start + self.workers]]
+            hashes.extend(f.result() for f in futures)
+            with self._lock:
+                self.completed += len(futures)
+        return hashes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,73 @@
+import threading
+import time
+from sqlalchemy import event, exc as sa_exc
+
+# --- CONNECTION POOL METRICS ---
+# Live view of a SQLAlchemy QueuePool: checked-out / idle / overflow from the pool
+# itself, plus counters fed by pool events and the time callers wait for a connection.
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def _incr(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def attach(self, sync_engine):
+        # For an AsyncEngine pass `async_engine.sync_engine`
+        self.pool = sync_engine.pool
+        event.listen(sync_engine, "checkout", lambda *args: self._incr("checkouts"))
+        event.listen(sync_engine, "checkin", lambda *args: self._incr("checkins"))
+        event.listen(sync_engine, "connect", lambda *args: self._incr("connects"))
+        event.listen(sync_engine, "invalidate", lambda *args: self._incr("invalidations"))
+        # dispose() swaps in a fresh pool instance
+        event.listen(sync_engine, "engine_disposed", lambda engine: setattr(self, "pool", engine.pool))
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": pool.size() if pool else 0,
+                "checked_out": pool.checkedout() if pool else 0,
+                "idle": pool.checkedin() if pool else 0,
+                "overflow": pool.overflow() if pool else 0,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_seconds_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3)
+            }
+
+def timed_pool_class(base, metrics: PoolMetrics):
+    # Pool subclass that times how long each checkout waits in `_do_get`
+    # (queueing for a free connection, or opening an overflow one).
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = base._do_get(self)
+        except Exception as exc:
+            metrics.record_wait(time.perf_counter() - start, timed_out=isinstance(exc, sa_exc.TimeoutError))
+            raise
+        metrics.record_wait(time.perf_counter() - start)
+        return conn
+
+    return type(f"Timed{base.__name__}", (base,), {"_do_get": _do_get})
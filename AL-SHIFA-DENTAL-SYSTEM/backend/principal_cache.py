@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+from sqlalchemy import inspect
+
+# --- IMMUTABLE ROW SNAPSHOTS ---
+# Plain copies of an ORM row's column values. Cached principals outlive the
+# session that loaded them (commit/rollback would expire live instances), so
+# they hold these instead of ORM objects.
+class Snapshot:
+    __slots__ = ("_values",)
+
+    def __init__(self, values: dict):
+        object.__setattr__(self, "_values", dict(values))
+
+    @classmethod
+    def of(cls, row, exclude: Iterable[str] = ()) -> "Snapshot":
+        skip = set(exclude)
+        return cls({a.key: getattr(row, a.key) for a in inspect(row).mapper.column_attrs if a.key not in skip})
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Snapshot is read-only")
+
+    def as_dict(self) -> dict:
+        return dict(self._values)
+
+# --- RESOLVED PRINCIPAL ---
+# The authenticated user plus their role profile (Doctor / Patient), loaded once.
+class Principal:
+    def __init__(self, user: Snapshot, profile: Optional[Snapshot] = None):
+        self.user = user
+        self.profile = profile
+
+    @classmethod
+    def from_rows(cls, user, profile=None) -> "Principal":
+        # The password hash never goes into the cache
+        return cls(Snapshot.of(user, exclude=("password_hash",)), Snapshot.of(profile) if profile is not None else None)
+
+    @property
+    def role(self) -> str:
+        return self.user.role
+
+# --- BOUNDED TTL + LRU CACHE ---
+# Keyed by user id. Entries hold Snapshot copies, never live ORM rows, so a
+# request's commit or rollback can't expire what other requests read.
+class PrincipalCache:
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id) -> Optional[Principal]:
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id, principal: Principal):
+        key = str(user_id)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
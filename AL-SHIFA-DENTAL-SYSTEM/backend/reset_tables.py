@@ -1,10 +1,12 @@
-from database import engine
-from models import Base
+from alembic import command
+from alembic.config import Config
+
+alembic_cfg = Config("alembic.ini")
 
 print("Dropping all tables...")
-Base.metadata.drop_all(bind=engine)
+command.downgrade(alembic_cfg, "base")
 
 print("Creating all tables...")
-Base.metadata.create_all(bind=engine)
+command.upgrade(alembic_cfg, "head")
 
 print("✅ SUCCESS: All tables reset and created successfully!")
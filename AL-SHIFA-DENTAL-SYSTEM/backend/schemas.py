@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from datetime import date  # <--- YEH LINE MISSING THI
 
@@ -20,6 +20,9 @@ class UserCreate(UserBase):
     age: Optional[int] = None
     gender: Optional[str] = None
 
+class BulkUserCreate(BaseModel):
+    users: List[UserCreate]
+
 # 3. Schema for Login (Incoming Data)
 class UserLogin(BaseModel):
     email: EmailStr
@@ -52,6 +55,28 @@ class AppointmentOut(BaseModel):
     class Config:
         from_attributes = True
 
+class AppointmentStatusUpdate(BaseModel):
+    status: str  # scheduled, confirmed, completed, cancelled
+
+# --- FINANCE SCHEMAS ---
+class InvoiceCreate(BaseModel):
+    appointment_id: UUID
+    procedure: str
+    amount: int
+    status: str = "Pending"
+
+class InvoiceStatusUpdate(BaseModel):
+    status: str  # Pending, Paid, Cancelled
+
+# --- INVENTORY SCHEMAS ---
+class InventoryBatchIn(BaseModel):
+    batch_id: str
+    expiry: date
+    qty: int
+
+class InventoryConsume(BaseModel):
+    qty: int
+
 # 5. Forgot Password Schema
 class ForgotPasswordRequest(BaseModel):
     email: EmailStr
\ No newline at end of file
@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import List, Optional
+from sqlalchemy import select
+import models
+from dashboard_stats import INACTIVE_STATUSES
+
+# --- SLOT AVAILABILITY INDEX ---
+# A doctor's day is a row of fixed-width slots inside working hours; bookings are a
+# bitmap over it (bit i set = slot i taken). Bitmaps are built from one indexed
+# query per (doctor, day) and cached briefly, so "is this slot free" is a bit test
+# and "free slots" is a walk over a few dozen bits. The partial unique index
+# uq_appointments_doctor_slot is what actually prevents double booking; the bitmap
+# only answers availability questions and is corrected after each write.
+
+SLOT_MINUTES = 30
+DAY_START_MINUTES = 9 * 60    # 09:00
+DAY_END_MINUTES = 17 * 60     # 17:00
+SLOTS_PER_DAY = (DAY_END_MINUTES - DAY_START_MINUTES) // SLOT_MINUTES
+FULL_MASK = (1 << SLOTS_PER_DAY) - 1
+
+TIME_FORMATS = ("%I:%M %p", "%I:%M%p", "%H:%M")
+
+class SlotError(ValueError):
+    pass
+
+def _parse_minutes(time_str: str) -> int:
+    for fmt in TIME_FORMATS:
+        try:
+            parsed = datetime.strptime(time_str.strip().upper(), fmt)
+            return parsed.hour * 60 + parsed.minute
+        except ValueError:
+            continue
+    raise SlotError(f"Unrecognised time '{time_str}'")
+
+def parse_slot(time_str: str) -> int:
+    minutes = _parse_minutes(time_str)
+    if not DAY_START_MINUTES <= minutes < DAY_END_MINUTES:
+        raise SlotError(f"{time_str} is outside working hours")
+    offset = minutes - DAY_START_MINUTES
+    if offset % SLOT_MINUTES:
+        raise SlotError(f"Appointments start every {SLOT_MINUTES} minutes")
+    return offset // SLOT_MINUTES
+
+def _label(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def slot_label(slot: int) -> str:
+    # Canonical stored form, 24-hour "HH:MM" (e.g. "14:30"), so ORDER BY time is chronological
+    return _label(DAY_START_MINUTES + slot * SLOT_MINUTES)
+
+def normalize_time(time_str: str) -> str:
+    # Any accepted spelling -> the stored "HH:MM" form, on or off the slot grid
+    return _label(_parse_minutes(time_str))
+
+def mask_from_times(times) -> int:
+    mask = 0
+    for t in times:
+        try:
+            mask |= 1 << parse_slot(t)
+        except SlotError:
+            continue  # legacy rows outside the slot grid don't block anything
+    return mask
+
+class SlotIndex:
+    def __init__(self, ttl_seconds: float = 30.0, maxsize: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(doctor_id, day: date):
+        return (str(doctor_id), day)
+
+    @staticmethod
+    def _booked_times_query(doctor_id, day: date):
+        return select(models.Appointment.time).where(
+            models.Appointment.doctor_id == doctor_id,
+            models.Appointment.date == day,
+            models.Appointment.status.notin_(INACTIVE_STATUSES)
+        )
+
+    def _cached(self, key) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _store(self, key, mask: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, mask)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    async def booked_mask(self, db, doctor_id, day: date) -> int:
+        key = self._key(doctor_id, day)
+        mask = self._cached(key)
+        if mask is None:
+            mask = mask_from_times((await db.execute(self._booked_times_query(doctor_id, day))).scalars())
+            self._store(key, mask)
+        return mask
+
+    def booked_mask_sync(self, db, doctor_id, day: date) -> int:
+        key = self._key(doctor_id, day)
+        mask = self._cached(key)
+        if mask is None:
+            mask = mask_from_times(db.execute(self._booked_times_query(doctor_id, day)).scalars())
+            self._store(key, mask)
+        return mask
+
+    @staticmethod
+    def free_slots_from_mask(mask: int, day: date) -> List[str]:
+        free = ~mask & FULL_MASK
+        first = 0
+        if day == date.today():
+            # Slots that have already started today are not bookable
+            now = datetime.now()
+            elapsed = now.hour * 60 + now.minute - DAY_START_MINUTES
+            first = max(0, elapsed // SLOT_MINUTES + 1)
+        return [slot_label(i) for i in range(first, SLOTS_PER_DAY) if free >> i & 1]
+
+    async def free_slots(self, db, doctor_id, day: date) -> List[str]:
+        return self.free_slots_from_mask(await self.booked_mask(db, doctor_id, day), day)
+
+    def free_slots_sync(self, db, doctor_id, day: date) -> List[str]:
+        return self.free_slots_from_mask(self.booked_mask_sync(db, doctor_id, day), day)
+
+    async def is_free(self, db, doctor_id, day: date, slot: int) -> bool:
+        return not (await self.booked_mask(db, doctor_id, day)) >> slot & 1
+
+    def _update(self, doctor_id, day: date, slot: int, booked: bool):
+        key = self._key(doctor_id, day)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return  # next read loads from the table
+            mask = entry[1] | (1 << slot) if booked else entry[1] & ~(1 << slot)
+            self._entries[key] = (entry[0], mask)
+
+    def mark_booked(self, doctor_id, day: date, slot: int):
+        self._update(doctor_id, day, slot, True)
+
+    def mark_free(self, doctor_id, day: date, slot: int):
+        self._update(doctor_id, day, slot, False)
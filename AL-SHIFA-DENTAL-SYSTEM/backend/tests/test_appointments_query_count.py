@@ -0,0 +1,73 @@
+import asyncio
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+import main
+import models
+from principal_cache import Principal
+
+# GET /appointments/my must stay one round trip no matter how many rows it
+# returns (doctor and hospital names come from joins, not per-row lookups).
+
+TABLES = [models.User.__table__, models.Hospital.__table__, models.Doctor.__table__,
+          models.Patient.__table__, models.Appointment.__table__, models.CacheVersion.__table__]
+
+class AsyncSessionAdapter:
+    # Just enough of AsyncSession for the endpoint, over a sync SQLite session
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def execute(self, stmt):
+        return self.session.execute(stmt)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(engine, tables=TABLES)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+def seed(db: Session, appointments: int):
+    hospital = models.Hospital(id=uuid.uuid4(), name="Al-Shifa", location="Lahore")
+    doctor_user = models.User(id=uuid.uuid4(), email=f"dr{uuid.uuid4().hex}@x.pk", password_hash="x", role="doctor")
+    patient_user = models.User(id=uuid.uuid4(), email=f"pt{uuid.uuid4().hex}@x.pk", password_hash="x", role="patient")
+    doctor = models.Doctor(id=uuid.uuid4(), user=doctor_user, hospital=hospital, full_name="Dr. Bilal", specialization="Endodontics")
+    patient = models.Patient(id=uuid.uuid4(), user=patient_user, full_name="Ali Khan")
+    db.add_all([hospital, doctor_user, patient_user, doctor, patient])
+    for i in range(appointments):
+        db.add(models.Appointment(
+            id=uuid.uuid4(), patient=patient, doctor=doctor, hospital_id=hospital.id,
+            date=date(2026, 1, 1) + timedelta(days=i // 16), time=f"{9 + i % 16 // 2:02d}:{30 * (i % 2):02d}",
+            status="scheduled"
+        ))
+    db.commit()
+    return Principal.from_rows(patient_user, patient), Principal.from_rows(doctor_user, doctor)
+
+def count_queries(db: Session, principal: Principal):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        rows = asyncio.run(main.get_my_appointments(date_from=None, date_to=None, principal=principal, db=AsyncSessionAdapter(db)))
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    return len(statements), rows
+
+@pytest.mark.parametrize("role", ["patient", "doctor"])
+def test_my_appointments_query_count_is_constant(db, role):
+    counts = []
+    for n in (1, 40):
+        db.query(models.Appointment).delete()
+        db.commit()
+        patient, doctor = seed(db, n)
+        queries, rows = count_queries(db, patient if role == "patient" else doctor)
+        assert len(rows) == n
+        assert all(r["doctor_name"] == "Dr. Bilal" and r["hospital_name"] == "Al-Shifa" for r in rows)
+        counts.append(queries)
+    assert counts == [1, 1]
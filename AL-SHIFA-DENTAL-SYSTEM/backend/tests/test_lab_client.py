@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import lab_stub
+from lab_client import NOT_FOUND, UNREACHABLE, LabStatusClient
+
+# LabStatusClient against the lab API stub (lab_stub.py), served in-process
+# through httpx's ASGI transport with a short per-request delay.
+
+LATENCY_MS = 50
+
+@pytest.fixture(autouse=True)
+def stub(monkeypatch):
+    monkeypatch.setattr(lab_stub, "LATENCY_MS", LATENCY_MS)
+    lab_stub.app.state.requests = 0
+    return lab_stub.app
+
+def make_client(**kwargs) -> LabStatusClient:
+    transport = httpx.ASGITransport(app=lab_stub.app)
+    return LabStatusClient("http://lab", client=httpx.AsyncClient(transport=transport), **kwargs)
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_statuses_and_not_found():
+    async def scenario():
+        client = make_client()
+        return await client.get_statuses(["LAB_9901", "LAB_9950", "NOPE"])
+
+    assert run(scenario()) == {"LAB_9901": "Shipped (Arriving Tomorrow)", "LAB_9950": "Processing", "NOPE": NOT_FOUND}
+
+def test_answers_are_cached_until_the_ttl_runs_out():
+    async def scenario():
+        client = make_client(ttl=0.2)
+        await client.get_status("LAB_9901")
+        await client.get_status("LAB_9901")
+        cached_requests = lab_stub.app.state.requests
+        await asyncio.sleep(0.25)
+        await client.get_status("LAB_9901")
+        return client, cached_requests
+
+    client, cached_requests = run(scenario())
+    assert cached_requests == 1
+    assert lab_stub.app.state.requests == 2
+    assert (client.hits, client.misses) == (1, 2)
+
+def test_concurrent_lookups_of_one_order_share_a_request():
+    async def scenario():
+        client = make_client()
+        return client, await asyncio.gather(*(client.get_status("LAB_9902") for _ in range(10)))
+
+    client, statuses = run(scenario())
+    assert statuses == ["Processing"] * 10
+    assert lab_stub.app.state.requests == 1
+    assert client.coalesced == 9
+
+def test_max_concurrency_bounds_requests_in_flight():
+    async def scenario():
+        client = make_client(max_concurrency=2)
+        start = time.perf_counter()
+        await client.get_statuses([f"LAB_99{i:02d}" for i in range(10, 16)])
+        return time.perf_counter() - start
+
+    # 6 orders, 2 at a time: at least three back-to-back rounds of latency
+    assert run(scenario()) >= 3 * LATENCY_MS / 1000
+    assert lab_stub.app.state.requests == 6
+
+def test_timeouts_are_reported_and_not_cached():
+    async def scenario():
+        client = make_client(timeout=LATENCY_MS / 1000 / 5)
+        return client, await client.get_status("LAB_9901")
+
+    client, status = run(scenario())
+    assert status == UNREACHABLE
+    assert client.failures == 1
+    assert client.stats()["cached"] == 0
+
+def test_malformed_responses_are_failures():
+    bodies = {"html": httpx.Response(200, text="<html>"), "no-status": httpx.Response(200, json={"order_id": "x"})}
+
+    async def scenario():
+        transport = httpx.MockTransport(lambda request: bodies[request.url.path.rsplit("/", 1)[1]])
+        client = LabStatusClient("http://lab", client=httpx.AsyncClient(transport=transport))
+        return client, await client.get_statuses(bodies)
+
+    client, statuses = run(scenario())
+    assert statuses == {"html": UNREACHABLE, "no-status": UNREACHABLE}
+    assert client.failures == 2
+    assert client.stats()["cached"] == 0
+
+def test_cache_evicts_least_recently_used_orders():
+    async def scenario():
+        client = make_client(max_entries=2)
+        await client.get_status("LAB_9901")
+        await client.get_status("LAB_9902")
+        await client.get_status("LAB_9901") # now the most recent
+        await client.get_status("LAB_9903") # evicts LAB_9902
+        return client
+
+    client = run(scenario())
+    assert list(client._cache) == ["LAB_9901", "LAB_9903"]
@@ -0,0 +1,100 @@
+import uuid
+from typing import List
+from sqlalchemy import String, any_, bindparam, insert, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.orm import Session
+import models, schemas
+from password_hasher import PasswordHasher
+from directory_cache import bump_directory_version
+
+# --- BULK USER + PROFILE PROVISIONING ---
+# Onboarding path for whole branches: emails that are already registered are
+# dropped with one set-based query before any bcrypt work, passwords are hashed
+# on the shared hasher pool, users are inserted with ON CONFLICT (email) DO
+# NOTHING so an email registered concurrently is skipped instead of failing the
+# chunk, and each chunk of users and their Doctor/Patient profiles is written in
+# a single transaction.
+
+DEFAULT_CHUNK_SIZE = 1000
+
+def _doctor_row(user_id, hospital_id, u: schemas.UserCreate) -> dict:
+    # Same defaults as POST /register
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "hospital_id": hospital_id,
+        "full_name": u.full_name,
+        "specialization": u.specialization or "General Dentist",
+        "license_number": u.license_number or "PENDING-000",
+        "is_verified": False
+    }
+
+def _patient_row(user_id, u: schemas.UserCreate) -> dict:
+    return {"id": uuid.uuid4(), "user_id": user_id, "full_name": u.full_name, "age": u.age, "gender": u.gender}
+
+def provision_users(db: Session, users: List[schemas.UserCreate], hasher: PasswordHasher,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    skipped = []
+    seen = set()
+    candidates = []
+    for u in users:
+        if u.role not in ("doctor", "patient"):
+            skipped.append({"email": u.email, "reason": "role must be doctor or patient"})
+        elif u.email in seen:
+            skipped.append({"email": u.email, "reason": "duplicate in request"})
+        else:
+            seen.add(u.email)
+            candidates.append(u)
+
+    existing = set(db.execute(
+        select(models.User.email).where(models.User.email == any_(bindparam("emails", type_=ARRAY(String)))),
+        {"emails": [u.email for u in candidates]}
+    ).scalars()) if candidates else set()
+    skipped.extend({"email": u.email, "reason": "Email already registered"} for u in candidates if u.email in existing)
+    candidates = [u for u in candidates if u.email not in existing]
+
+    hospital_id = None
+    if any(u.role == "doctor" for u in candidates):
+        hospital = db.query(models.Hospital).first()
+        if not hospital:
+            first_doctor = next(u for u in candidates if u.role == "doctor")
+            hospital = models.Hospital(name=first_doctor.hospital_name or "General Clinic", location="City Center")
+            db.add(hospital)
+            db.commit()
+        hospital_id = hospital.id
+
+    created = doctors_created = 0
+    for start in range(0, len(candidates), chunk_size):
+        chunk = candidates[start:start + chunk_size]
+        hashes = hasher.hash_many([u.password for u in chunk])
+        user_rows = [
+            {"id": uuid.uuid4(), "email": u.email, "password_hash": password_hash, "role": u.role, "is_active": True}
+            for u, password_hash in zip(chunk, hashes)
+        ]
+        inserted = dict(db.execute(
+            pg_insert(models.User).values(user_rows)
+            .on_conflict_do_nothing(index_elements=[models.User.email])
+            .returning(models.User.email, models.User.id)
+        ).all())
+
+        doctor_rows, patient_rows = [], []
+        for u in chunk:
+            user_id = inserted.get(u.email)
+            if user_id is None:
+                skipped.append({"email": u.email, "reason": "Email already registered"})
+            elif u.role == "doctor":
+                doctor_rows.append(_doctor_row(user_id, hospital_id, u))
+            else:
+                patient_rows.append(_patient_row(user_id, u))
+
+        if doctor_rows:
+            db.execute(insert(models.Doctor), doctor_rows)
+            # Core inserts bypass the ORM flush hook that versions the directory
+            bump_directory_version(db)
+        if patient_rows:
+            db.execute(insert(models.Patient), patient_rows)
+        db.commit()
+        created += len(inserted)
+        doctors_created += len(doctor_rows)
+
+    return {"created": created, "doctors_created": doctors_created, "skipped": skipped}
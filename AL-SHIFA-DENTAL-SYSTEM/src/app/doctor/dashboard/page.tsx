@@ -40,6 +40,48 @@ export default function DoctorDashboard() {
     fetchDashboard();
   }, []);
 
+  // Live updates: apply pushed events instead of re-querying the dashboard
+  useEffect(() => {
+    const token = localStorage.getItem("token");
+    if (!token) return;
+
+    const source = new EventSource(`${api.defaults.baseURL}/doctor/events?token=${encodeURIComponent(token)}`);
+    let reconnecting = false;
+
+    source.onopen = () => {
+      // Events may have been missed while disconnected
+      if (reconnecting) fetchDashboard();
+      reconnecting = false;
+    };
+    source.onerror = () => {
+      reconnecting = true;
+    };
+    source.onmessage = (message) => {
+      const event = JSON.parse(message.data);
+      if (event.type === "resync") {
+        fetchDashboard();
+        return;
+      }
+      setStats((prev: any) => {
+        // total_patients is doctor-wide; the other counters only belong to the day on screen
+        const next = { ...prev, total_patients: prev.total_patients + event.delta.total_patients };
+        if (event.date !== prev.date) return next;
+        next.today_count = prev.today_count + event.delta.appointments;
+        next.revenue = prev.revenue + event.delta.revenue;
+        if (event.type === "appointment_created") {
+          next.appointments = [...prev.appointments, event.appointment].sort((a: any, b: any) => a.time.localeCompare(b.time));
+        } else if (event.type === "status_changed") {
+          next.appointments = prev.appointments.map((a: any) =>
+            a.id === event.appointment.id ? { ...a, status: event.appointment.status } : a
+          );
+        }
+        return next;
+      });
+    };
+
+    return () => source.close();
+  }, []);
+
   return (
     <div className="space-y-6">
       
@@ -10,17 +10,23 @@ export default function FinancePage() {
   const router = useRouter();
   const [data, setData] = useState<any>({ total_revenue: 0, total_pending: 0, invoices: [] });
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
-  const fetchFinance = async () => {
+  // First call loads totals + the first page; "Load more" appends the next keyset page
+  const fetchFinance = async (cursor: string | null = null) => {
     setLoading(true);
     const token = localStorage.getItem("token");
     if (!token) return router.push("/auth/doctor/login");
 
     try {
       const response = await api.get("/doctor/finance", {
-        headers: { Authorization: `Bearer ${token}` }
+        headers: { Authorization: `Bearer ${token}` },
+        params: { limit: 50, ...(cursor ? { cursor } : {}) }
       });
-      setData(response.data);
+      setData((prev: any) => cursor
+        ? { ...response.data, invoices: [...prev.invoices, ...response.data.invoices] }
+        : response.data);
+      setNextCursor(response.headers["x-next-cursor"] || null);
     } catch (error) {
       console.error("Failed to load finance data", error);
     } finally {
@@ -36,7 +42,7 @@ export default function FinancePage() {
     <div className="space-y-6">
       <div className="flex justify-between items-center">
         <h1 className="text-2xl font-bold text-slate-900">Financial Overview</h1>
-        <Button variant="outline" onClick={fetchFinance} disabled={loading}>
+        <Button variant="outline" onClick={() => fetchFinance()} disabled={loading}>
           <RefreshCcw className={`mr-2 h-4 w-4 ${loading ? 'animate-spin' : ''}`} /> Refresh
         </Button>
       </div>
@@ -114,6 +120,11 @@ export default function FinancePage() {
                </tbody>
              </table>
            )}
+           {nextCursor && (
+             <div className="text-center pt-4">
+               <Button variant="outline" onClick={() => fetchFinance(nextCursor)} disabled={loading}>Load more</Button>
+             </div>
+           )}
         </CardContent>
       </Card>
     </div>
@@ -8,35 +8,39 @@ import { Search, Plus, User, ChevronRight, Loader2 } from "lucide-react";
 import api from "@/lib/api";
 import { useRouter } from "next/navigation";
 
+const PAGE_SIZE = 100;
+
 export default function PatientList() {
   const router = useRouter();
   const [patients, setPatients] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
   const [search, setSearch] = useState("");
+  const [hasMore, setHasMore] = useState(false);
 
-  useEffect(() => {
-    const fetchPatients = async () => {
-      const token = localStorage.getItem("token");
-      if (!token) return router.push("/auth/doctor/login");
+  const fetchPatients = async (offset = 0) => {
+    const token = localStorage.getItem("token");
+    if (!token) return router.push("/auth/doctor/login");
 
-      try {
-        const response = await api.get("/doctor/patients", {
-          headers: { Authorization: `Bearer ${token}` }
-        });
-        setPatients(response.data);
-      } catch (error) {
-        console.error("Error fetching patients", error);
-      } finally {
-        setLoading(false);
-      }
-    };
-    fetchPatients();
-  }, [router]);
+    setLoading(true);
+    try {
+      const response = await api.get("/doctor/patients", {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { limit: PAGE_SIZE, offset, ...(search ? { q: search } : {}) }
+      });
+      setPatients((prev) => offset ? [...prev, ...response.data] : response.data);
+      setHasMore(response.data.length === PAGE_SIZE);
+    } catch (error) {
+      console.error("Error fetching patients", error);
+    } finally {
+      setLoading(false);
+    }
+  };
 
-  // Search Logic
-  const filteredPatients = patients.filter(p => 
-    p.name.toLowerCase().includes(search.toLowerCase())
-  );
+  // Search is done by the server so it covers every patient, not just the loaded pages
+  useEffect(() => {
+    const timer = setTimeout(() => fetchPatients(), 300);
+    return () => clearTimeout(timer);
+  }, [search]);
 
   return (
     <div className="space-y-6">
@@ -64,11 +68,11 @@ export default function PatientList() {
       {/* Patients Table */}
       <Card>
         <CardContent className="p-0">
-          {loading ? (
+          {loading && patients.length === 0 ? (
             <div className="flex justify-center items-center py-10">
               <Loader2 className="h-8 w-8 animate-spin text-doctor" />
             </div>
-          ) : filteredPatients.length === 0 ? (
+          ) : patients.length === 0 ? (
             <div className="text-center py-10 text-slate-500">
               No patients found. Appointments will appear here.
             </div>
@@ -85,7 +89,7 @@ export default function PatientList() {
                 </tr>
               </thead>
               <tbody className="divide-y divide-slate-100">
-                {filteredPatients.map((p) => (
+                {patients.map((p) => (
                   <tr key={p.id} className="hover:bg-slate-50 transition-colors group">
                     <td className="p-4">
                       <div className="flex items-center gap-3">
@@ -115,6 +119,13 @@ export default function PatientList() {
               </tbody>
             </table>
           )}
+          {hasMore && (
+            <div className="text-center p-4">
+              <Button variant="outline" onClick={() => fetchPatients(patients.length)} disabled={loading}>
+                Load more
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
     </div>
@@ -10,20 +10,23 @@ export default function SchedulePage() {
   const router = useRouter();
   const [appointments, setAppointments] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   // Time slots for the daily view grid
   const timeSlots = ["09:00 AM", "10:00 AM", "11:00 AM", "12:00 PM", "01:00 PM", "02:00 PM", "03:00 PM", "04:00 PM"];
 
-  const fetchSchedule = async () => {
+  const fetchSchedule = async (cursor: string | null = null) => {
     setLoading(true);
     const token = localStorage.getItem("token");
     if (!token) return router.push("/auth/doctor/login");
 
     try {
       const response = await api.get("/doctor/schedule", {
-        headers: { Authorization: `Bearer ${token}` }
+        headers: { Authorization: `Bearer ${token}` },
+        params: { limit: 100, ...(cursor ? { cursor } : {}) }
       });
-      setAppointments(response.data);
+      setAppointments((prev) => cursor ? [...prev, ...response.data] : response.data);
+      setNextCursor(response.headers["x-next-cursor"] || null);
     } catch (error) {
       console.error("Failed to load schedule", error);
     } finally {
@@ -37,8 +40,11 @@ export default function SchedulePage() {
 
   // Helper to find appointment for a specific time slot
   const getApptForSlot = (time: string) => {
-    // Simple string matching for now (e.g., "10:00 AM" matches "10:00")
-    return appointments.find(a => a.time.includes(time.split(" ")[0])); // simplistic match
+    // Appointments store 24-hour "HH:MM"; the grid labels are 12-hour ("01:00 PM" -> "13:00")
+    const [clock, period] = time.split(" ");
+    const [hours, minutes] = clock.split(":").map(Number);
+    const key = `${String((hours % 12) + (period === "PM" ? 12 : 0)).padStart(2, "0")}:${String(minutes).padStart(2, "0")}`;
+    return appointments.find(a => a.time === key);
   };
 
   return (
@@ -46,7 +52,7 @@ export default function SchedulePage() {
       <div className="flex items-center justify-between">
         <h1 className="text-2xl font-bold text-slate-900">Weekly Schedule</h1>
         <div className="flex gap-2">
-            <Button variant="outline" onClick={fetchSchedule} disabled={loading}>
+            <Button variant="outline" onClick={() => fetchSchedule()} disabled={loading}>
                 <RefreshCcw className={`mr-2 h-4 w-4 ${loading ? 'animate-spin' : ''}`} /> Refresh
             </Button>
             <Button variant="doctor">
@@ -64,7 +70,7 @@ export default function SchedulePage() {
             </CardTitle>
             </CardHeader>
             <CardContent>
-            {loading ? (
+            {loading && appointments.length === 0 ? (
                 <div className="py-10 text-center"><Loader2 className="h-8 w-8 animate-spin mx-auto text-doctor"/></div>
             ) : (
                 <div className="space-y-2">
@@ -108,7 +114,7 @@ export default function SchedulePage() {
             <CardContent>
                 <div className="space-y-4">
                     {appointments.length === 0 && !loading && <p className="text-slate-500 text-sm">No upcoming appointments.</p>}
-                    {appointments.slice(0, 5).map((appt: any) => (
+                    {appointments.map((appt: any) => (
                         <div key={appt.id} className="flex gap-3 items-start border-b border-slate-100 pb-3 last:border-0">
                             <div className="bg-slate-100 p-2 rounded-lg text-center min-w-[50px]">
                                 <span className="block text-xs text-slate-500 font-bold uppercase">{new Date(appt.date).toLocaleDateString('en-US', { weekday: 'short' })}</span>
@@ -123,6 +129,11 @@ export default function SchedulePage() {
                             </div>
                         </div>
                     ))}
+                    {nextCursor && (
+                        <div className="text-center pt-2">
+                            <Button variant="outline" size="sm" onClick={() => fetchSchedule(nextCursor)} disabled={loading}>Load more</Button>
+                        </div>
+                    )}
                 </div>
             </CardContent>
         </Card>
@@ -111,9 +111,12 @@ export default function NewAppointment() {
 
     try {
       // Call the Appointment Agent
+      const token = localStorage.getItem("token");
       const response = await api.post("/agent/appointment", {
         user_query: userMsg,
         session_id: "PATIENT_SESSION" // In real app, use actual session ID
+      }, {
+        headers: { Authorization: `Bearer ${token}` }
       });
 
       const agentData = response.data;
@@ -43,11 +43,11 @@ export default function AgentChat({ agentType, agentName }: { agentType: AgentTy
       // 2. Prepare Payload (All agents accept user_query)
       const payload: any = { user_query: userMsg, session_id: "SESSION_1" };
       
-      // Add specific fields if needed (e.g. role for finance)
-      if (agentType === "finance") payload.role = "doctor";
-
-      // 3. Send Request
-      const response = await api.post(endpoint, payload);
+      // 3. Send Request (finance answers are scoped to the signed-in doctor)
+      const token = localStorage.getItem("token");
+      const response = await api.post(endpoint, payload, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {}
+      });
       
       // 4. Update Chat
       setMessages((prev) => [